@@ -1,3 +1,4 @@
+from . import settings as _settings
 from .settings import (
     # Base configurations
     PROJECT_ROOT,
@@ -7,16 +8,17 @@ from .settings import (
     BaseConfig,
 
     # Vision API configurations
-    VISION_CONFIG,
     VISION_OUTPUT_CONFIG,
     VISION_CONSTANTS,
 
     # Cloud service configurations
     GCP_CONFIG,
-    GEMINI_CONFIG,
-    CLAUDE_CONFIG,
 )
 
+# VISION_CONFIG, GEMINI_CONFIG and CLAUDE_CONFIG are built on first access
+def __getattr__(name):
+    return getattr(_settings, name)
+
 __all__ = [
     # Base configurations
     'PROJECT_ROOT',
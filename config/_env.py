@@ -0,0 +1,35 @@
+import os
+import logging
+from functools import lru_cache
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=1)
+def _load() -> bool:
+    """
+    Load environment settings into os.environ exactly once per process
+
+    Uses the module generated by `python -m config.compile_env` when present
+    and still matching the .env file it was compiled from, skipping .env
+    parsing entirely; otherwise falls back to load_dotenv(). Like
+    load_dotenv(), existing environment variables are never overridden.
+    """
+    try:
+        from ._env_generated import ENV, SOURCE, SOURCE_SIGNATURE
+    except ImportError:
+        load_dotenv()
+        return True
+
+    from .compile_env import env_file_signature
+    if env_file_signature(SOURCE) != SOURCE_SIGNATURE:
+        logger.warning(
+            f"{SOURCE} changed since config/_env_generated.py was generated; "
+            "loading it directly. Run `python -m config.compile_env` to refresh."
+        )
+        load_dotenv()
+        return True
+
+    for key, value in ENV.items():
+        os.environ.setdefault(key, value)
+    return True
@@ -0,0 +1,66 @@
+import os
+import sys
+from pathlib import Path
+from typing import Optional, Tuple
+from dotenv import dotenv_values
+
+CONFIG_DIR = Path(__file__).resolve().parent
+DEFAULT_ENV_FILE = CONFIG_DIR.parent / '.env'
+GENERATED_MODULE = CONFIG_DIR / '_env_generated.py'
+
+def env_file_signature(env_file: Path) -> Optional[Tuple[int, int]]:
+    """Return (mtime_ns, size) of an env file, or None if it does not exist"""
+    try:
+        stat = os.stat(env_file)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+def compile_env(env_file: Path = DEFAULT_ENV_FILE, output_file: Path = GENERATED_MODULE) -> Path:
+    """
+    Compile a .env file into a plain Python module
+
+    The generated module is imported by config._env instead of parsing .env
+    at every process start, and is byte-compiled like any other module. It
+    records the source file's path, modification time and size so a later
+    edit to the file is detected and the stale module is ignored.
+
+    Args:
+        env_file: Path to the .env file to read
+        output_file: Path of the Python module to write
+
+    Returns:
+        Path: Path to the generated module
+    """
+    values = {
+        key: value
+        for key, value in dotenv_values(env_file).items()
+        if value is not None
+    }
+
+    env_file = Path(env_file).resolve()
+    lines = [
+        '# Generated by `python -m config.compile_env` - do not edit by hand.',
+        'from typing import Dict',
+        '',
+        f'SOURCE: str = {str(env_file)!r}',
+        f'SOURCE_SIGNATURE = {env_file_signature(env_file)!r}',
+        '',
+        'ENV: Dict[str, str] = {',
+    ]
+    lines.extend(f'    {key!r}: {value!r},' for key, value in sorted(values.items()))
+    lines.append('}')
+
+    output_file.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+    return output_file
+
+def main():
+    env_file = Path(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_ENV_FILE
+    if not env_file.exists():
+        print(f"Env file not found: {env_file}", file=sys.stderr)
+        sys.exit(1)
+    output_file = compile_env(env_file)
+    print(f"Wrote {output_file}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+import atexit
+import queue
+import logging
+from logging.handlers import QueueHandler, QueueListener
+from .settings import LOGGING_CONFIG
+
+# Formatter shared by every handler so the format string is parsed only once
+_FORMATTER = logging.Formatter(LOGGING_CONFIG['format'])
+_MESSAGE_FORMATTER = logging.Formatter('%(message)s')
+
+def configure_logging(log_to_file: bool = False) -> None:
+    """
+    Configure root logging once per process
+
+    Args:
+        log_to_file: Also write records to LOGGING_CONFIG['file_path']
+    """
+    if getattr(configure_logging, '_done', False):
+        return
+
+    handlers = [logging.StreamHandler()]
+    if log_to_file:
+        handlers.append(logging.FileHandler(LOGGING_CONFIG['file_path']))
+    for handler in handlers:
+        handler.setFormatter(_FORMATTER)
+
+    # Callers only enqueue records; a listener thread writes them to the
+    # console and log file, so logging never waits on terminal or disk I/O
+    record_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(record_queue)
+    # The queued record carries only the rendered message (and traceback);
+    # the listener's handlers apply the configured format
+    queue_handler.setFormatter(_MESSAGE_FORMATTER)
+    listener = QueueListener(record_queue, *handlers, respect_handler_level=True)
+
+    # force=True replaces handlers installed by earlier import-time basicConfig calls
+    logging.basicConfig(
+        level=getattr(logging, LOGGING_CONFIG['level']),
+        handlers=[queue_handler],
+        force=True
+    )
+    listener.start()
+
+    def _stop_listener() -> None:
+        """Drain the queue, then write directly for records logged later in shutdown"""
+        listener.stop()
+        root = logging.getLogger()
+        root.removeHandler(queue_handler)
+        for handler in handlers:
+            root.addHandler(handler)
+
+    atexit.register(_stop_listener)
+    configure_logging._done = True
@@ -1,42 +1,62 @@
 from typing import Dict, Any
+from functools import lru_cache
+from types import MappingProxyType
+from pathlib import Path
 import os
-from dotenv import load_dotenv
+from ._env import _load
 
-load_dotenv()
+_load()
+
+# Snapshot of the process environment taken once after .env is loaded;
+# plain dict reads are cheaper than going through os.environ every time
+_ENV: Dict[str, str] = dict(os.environ)
 
 # Base utility class for configuration
 class BaseConfig:
     """Base configuration class with common utilities for environment variable handling"""
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_env_bool(key: str, default: bool = False) -> bool:
         """Get boolean value from environment variable"""
-        return os.getenv(key, str(default)).lower() == 'true'
+        return _ENV.get(key, str(default)).lower() == 'true'
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_env_int(key: str, default: int) -> int:
         """Get integer value from environment variable"""
-        return int(os.getenv(key, str(default)))
+        return int(_ENV.get(key, str(default)))
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def get_env_float(key: str, default: float) -> float:
         """Get float value from environment variable"""
-        return float(os.getenv(key, str(default)))
+        return float(_ENV.get(key, str(default)))
 
 # Project root and directory configuration
-PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_ROOT / 'data'
+INPUT_DIR = DATA_DIR / 'input'
+OUTPUT_DIR = DATA_DIR / 'output'
+VISION_OUTPUT_DIR = OUTPUT_DIR / 'vision'
+GEMINI_OUTPUT_DIR = OUTPUT_DIR / 'gemini'
+CLAUDE_OUTPUT_DIR = OUTPUT_DIR / 'claude'
+CACHE_DIR = DATA_DIR / 'cache'
+LOGS_DIR = PROJECT_ROOT / 'logs'
+
+_REQUIRED_DIRECTORIES = (
+    INPUT_DIR,
+    OUTPUT_DIR,
+    VISION_OUTPUT_DIR,
+    GEMINI_OUTPUT_DIR,
+    CLAUDE_OUTPUT_DIR,
+    LOGS_DIR,
+)
 
+@lru_cache(maxsize=1)
 def ensure_directories_exist():
-    """Create necessary directories if they don't exist"""
-    directories = [
-        os.path.join(PROJECT_ROOT, 'data', 'input'),
-        os.path.join(PROJECT_ROOT, 'data', 'output'),
-        os.path.join(PROJECT_ROOT, 'data', 'output', 'vision'),
-        os.path.join(PROJECT_ROOT, 'data', 'output', 'gemini'),
-        os.path.join(PROJECT_ROOT, 'data', 'output', 'claude'),
-        os.path.join(PROJECT_ROOT, 'logs'),
-    ]
-    for directory in directories:
+    """Create necessary directories if they don't exist (once per process)"""
+    for directory in _REQUIRED_DIRECTORIES:
         os.makedirs(directory, exist_ok=True)
 
 # Create directories on import
@@ -48,27 +68,39 @@ ensure_directories_exist()
 
 # Logging Configuration
 LOGGING_CONFIG: Dict[str, Any] = {
-    'level': os.getenv('LOG_LEVEL', 'INFO'),
+    'level': _ENV.get('LOG_LEVEL', 'INFO'),
     'format': '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    'file_path': os.path.join(PROJECT_ROOT, 'logs', 'app.log')
+    'file_path': os.fspath(LOGS_DIR / 'app.log')
 }
 
 # Security Configuration
 SECURITY_CONFIG: Dict[str, Any] = {
     'enable_audit_logs': BaseConfig.get_env_bool('ENABLE_AUDIT_LOGS', True),
+    # Audit records are buffered and flushed to disk every N documents
+    'audit_flush_interval': BaseConfig.get_env_int('AUDIT_FLUSH_INTERVAL', 20),
     'data_retention_days': BaseConfig.get_env_int('DATA_RETENTION_DAYS', 30),
     'delete_after_processing': BaseConfig.get_env_bool('DELETE_AFTER_PROCESSING', True)
 }
 
+# Supported input formats, frozen so they can be shared without defensive copies
+ALLOWED_EXTENSIONS = frozenset({'.pdf', '.png', '.jpg', '.jpeg'})
+SUPPORTED_MIME_TYPES = MappingProxyType({
+    '.pdf': 'application/pdf',
+    '.png': 'image/png',
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg'
+})
+
 # File Processing Configuration
 FILE_CONFIG: Dict[str, Any] = {
-    'allowed_extensions': ['.pdf', '.png', '.jpg', '.jpeg'],
+    'allowed_extensions': ALLOWED_EXTENSIONS,
     'max_file_size': 10 * 1024 * 1024,  # 10MB
-    'input_directory': os.path.join(PROJECT_ROOT, 'data', 'input'),
-    'output_directory': os.path.join(PROJECT_ROOT, 'data', 'output'),
-    'vision_output_directory': os.path.join(PROJECT_ROOT, 'data', 'output', 'vision'),
-    'gemini_output_directory': os.path.join(PROJECT_ROOT, 'data', 'output', 'gemini'),
-    'claude_output_directory': os.path.join(PROJECT_ROOT, 'data', 'output', 'claude'),
+    'input_directory': os.fspath(INPUT_DIR),
+    'output_directory': os.fspath(OUTPUT_DIR),
+    'vision_output_directory': os.fspath(VISION_OUTPUT_DIR),
+    'gemini_output_directory': os.fspath(GEMINI_OUTPUT_DIR),
+    'claude_output_directory': os.fspath(CLAUDE_OUTPUT_DIR),
+    'vision_cache_path': os.fspath(CACHE_DIR / 'ocr_cache.sqlite3'),
     'vision_output_filename_pattern': 'vision_results_{timestamp}.json',
     'gemini_output_filename_pattern': 'gemini_summary_{timestamp}.json',
     'claude_output_filename_pattern': 'claude_summary_{timestamp}.json',
@@ -81,93 +113,207 @@ FILE_CONFIG: Dict[str, Any] = {
 
 # Vision API Constants
 VISION_CONSTANTS = {
-    'supported_mime_types': {
-        '.pdf': 'application/pdf',
-        '.png': 'image/png',
-        '.jpg': 'image/jpeg',
-        '.jpeg': 'image/jpeg'
-    },
+    'supported_mime_types': SUPPORTED_MIME_TYPES,
+    # Pages a synchronous batch_annotate_files call returns; longer PDFs are
+    # routed to async_batch_annotate_files so no page is dropped
     'max_pages_per_request': 5,
     'default_language_hints': ['ja', 'en']
 }
 
 # Vision API Core Configuration
-VISION_CONFIG: Dict[str, Any] = {
-    'max_retries': BaseConfig.get_env_int('VISION_MAX_RETRIES', 3),
-    'timeout': BaseConfig.get_env_int('VISION_TIMEOUT', 30),
-    'confidence_threshold': BaseConfig.get_env_float('VISION_CONFIDENCE_THRESHOLD', 0.7),
-    'supported_languages': ['ja', 'en'],
-    'batch_size': BaseConfig.get_env_int('VISION_BATCH_SIZE', 10),
-    'default_language_hints': VISION_CONSTANTS['default_language_hints']
-}
+def _build_vision_config() -> Dict[str, Any]:
+    """Build the Vision API core configuration"""
+    return {
+        'max_retries': BaseConfig.get_env_int('VISION_MAX_RETRIES', 3),
+        'timeout': BaseConfig.get_env_int('VISION_TIMEOUT', 30),
+        # Concurrent Vision calls allowed per process and the backoff cap
+        # between retries of throttled/unavailable calls
+        'max_inflight': BaseConfig.get_env_int('VISION_MAX_INFLIGHT', 8),
+        'max_retry_delay': BaseConfig.get_env_float('VISION_MAX_RETRY_DELAY', 60.0),
+        # Threads shared by all processors for GCS transfers and result saving
+        'io_workers': BaseConfig.get_env_int('VISION_IO_WORKERS', 32),
+        # Files up to this size are sent inline with the request instead of
+        # being staged in GCS; kept well below max_file_size so large scans
+        # still take the upload path
+        'inline_max_bytes': BaseConfig.get_env_int('VISION_INLINE_MAX_BYTES', 4 * 1024 * 1024),
+        # Seconds to wait for an async_batch_annotate_files operation and the
+        # number of pages per JSON shard it writes to GCS
+        'operation_timeout': BaseConfig.get_env_int('VISION_OPERATION_TIMEOUT', 600),
+        'output_pages_per_shard': BaseConfig.get_env_int('VISION_OUTPUT_PAGES_PER_SHARD', 100),
+        # Batches of process_documents allowed to run at once, so later uploads
+        # overlap earlier annotate/save phases
+        'batches_in_flight': BaseConfig.get_env_int('VISION_BATCHES_IN_FLIGHT', 2),
+        # Responses are cached by file content so unchanged documents skip the
+        # API; entries expire after cache_ttl seconds (0 keeps them for the
+        # full data retention period) and are purged from disk once expired
+        'cache_enabled': BaseConfig.get_env_bool('VISION_CACHE_ENABLED', True),
+        'cache_ttl': BaseConfig.get_env_int(
+            'VISION_CACHE_TTL',
+            SECURITY_CONFIG['data_retention_days'] * 24 * 60 * 60
+        ),
+        'confidence_threshold': BaseConfig.get_env_float('VISION_CONFIDENCE_THRESHOLD', 0.7),
+        'supported_languages': ['ja', 'en'],
+        'batch_size': BaseConfig.get_env_int('VISION_BATCH_SIZE', 10),
+        'default_language_hints': VISION_CONSTANTS['default_language_hints']
+    }
 
 # Vision API Output Configuration
 VISION_OUTPUT_CONFIG: Dict[str, Any] = {
-    'output_mode': os.getenv('VISION_OUTPUT_MODE', 'simple'), # 'detailed' or 'simple'
+    'output_mode': _ENV.get('VISION_OUTPUT_MODE', 'simple'), # 'detailed' or 'simple'
     'include_confidence': BaseConfig.get_env_bool('VISION_INCLUDE_CONFIDENCE', True),
     'include_bounding_boxes': BaseConfig.get_env_bool('VISION_INCLUDE_BOUNDING_BOXES', True),
     'min_confidence_threshold': BaseConfig.get_env_float('VISION_MIN_CONFIDENCE', 0.0),
     'save_raw_response': BaseConfig.get_env_bool('VISION_SAVE_RAW_RESPONSE', True),
+    # Raw response encoding: 'pb' (binary protobuf, fastest), 'json' or 'text'
+    # (the protobuf text format previously written to _raw.txt)
+    'raw_response_format': _ENV.get('VISION_RAW_RESPONSE_FORMAT', 'pb'),
+    # Documents with at least parallel_page_threshold pages are extracted in
+    # page_workers worker processes
+    'parallel_pages': BaseConfig.get_env_bool('VISION_PARALLEL_PAGES', True),
+    'parallel_page_threshold': BaseConfig.get_env_int('VISION_PARALLEL_PAGE_THRESHOLD', 8),
+    'page_workers': BaseConfig.get_env_int('VISION_PAGE_WORKERS', os.cpu_count() or 1),
 }
 
 # -----------------------------------------------------------------------------
 # Generative AI Configurations
 # -----------------------------------------------------------------------------
 
+# Resumable upload chunks must be a multiple of this many bytes
+_GCS_CHUNK_MULTIPLE = 256 * 1024
+
 # GCP Configuration for Gemini
 GCP_CONFIG: Dict[str, Any] = {
-    'project_id': os.getenv('GCP_PROJECT_ID', ''),
-    'credentials_path': os.path.join(
-        PROJECT_ROOT,
-        'credentials',
-        os.getenv('GCP_CREDENTIALS_FILE', 'gcp-service-account.json')
+    'project_id': _ENV.get('GCP_PROJECT_ID', ''),
+    'credentials_path': os.fspath(
+        PROJECT_ROOT / 'credentials' / _ENV.get('GCP_CREDENTIALS_FILE', 'gcp-service-account.json')
     ),
-    'storage_bucket': os.getenv('GCP_STORAGE_BUCKET', ''),
-    'bucket_prefix': os.getenv('GCP_BUCKET_PREFIX', 'medical_documents/'),
-    'region': os.getenv('GCP_REGION', 'asia-northeast1'),
-    'api_key': os.getenv('GEMINI_API_KEY', '')
+    'storage_bucket': _ENV.get('GCP_STORAGE_BUCKET', ''),
+    'bucket_prefix': _ENV.get('GCP_BUCKET_PREFIX', 'medical_documents/'),
+    'region': _ENV.get('GCP_REGION', 'asia-northeast1'),
+    # Large uploads are sent as resumable uploads in chunks of this many bytes,
+    # which bounds the memory held per upload; GCS only accepts multiples of
+    # 256 KiB, so other values are rounded up
+    'upload_chunk_size': -(-BaseConfig.get_env_int('GCP_UPLOAD_CHUNK_SIZE', 8 * 1024 * 1024)
+                           // _GCS_CHUNK_MULTIPLE) * _GCS_CHUNK_MULTIPLE,
+    'upload_timeout': BaseConfig.get_env_int('GCP_UPLOAD_TIMEOUT', 300),
+    'api_key': _ENV.get('GEMINI_API_KEY', '')
 }
 
 class PromptTemplates:
     """Prompt templates for different languages"""
     JAPANESE = {
         'summary': '以下の文書を要約してください：\n{text}\n\n要約：',
+        'batch_summary': (
+            '以下の文書の各ページを要約し、さらに文書全体の要約を作成してください。\n'
+            '次の形式のJSONのみを出力してください：\n'
+            '{{"page_summaries": [{{"page_number": 1, "summary": "..."}}], '
+            '"overall_summary": "..."}}\n\n{text}'
+        ),
+        'page_marker': '===== ページ {page_number} =====',
+        'json_retry_suffix': '\n\n有効なJSONのみを出力してください。',
         'max_tokens_per_chunk': 1000
     }
 
     ENGLISH = {
         'summary': 'Please summarize the following document:\n{text}\n\nSummary:',
+        'batch_summary': (
+            'Summarize each page of the following document, then the document as a whole.\n'
+            'Respond only with JSON in this format:\n'
+            '{{"page_summaries": [{{"page_number": 1, "summary": "..."}}], '
+            '"overall_summary": "..."}}\n\n{text}'
+        ),
+        'page_marker': '===== Page {page_number} =====',
+        'json_retry_suffix': '\n\nRespond with valid JSON only.',
         'max_tokens_per_chunk': 1000
     }
 
+# Language settings shared (not copied) by every generative provider config;
+# read-only so one provider cannot mutate another's prompts
+_LANGUAGE_SETTINGS = MappingProxyType({
+    'ja': MappingProxyType(PromptTemplates.JAPANESE),
+    'en': MappingProxyType(PromptTemplates.ENGLISH),
+})
+
 # Gemini Configuration
-GEMINI_CONFIG: Dict[str, Any] = {
-    'model': 'gemini-pro',
-    'temperature': BaseConfig.get_env_float('GEMINI_TEMPERATURE', 0.3),
-    'max_output_tokens': BaseConfig.get_env_int('GEMINI_MAX_OUTPUT_TOKENS', 2048),
-    'top_p': BaseConfig.get_env_float('GEMINI_TOP_P', 0.8),
-    'top_k': BaseConfig.get_env_int('GEMINI_TOP_K', 40),
-    'language_settings': {
-        'ja': PromptTemplates.JAPANESE,
-        'en': PromptTemplates.ENGLISH
+def _build_gemini_config() -> Dict[str, Any]:
+    """Build the Gemini configuration"""
+    return {
+        'model': 'gemini-pro',
+        # gRPC runs over a single multiplexed HTTP/2 channel; 'rest' falls back to HTTP/1.1.
+        # The asyncio flavour is required by generate_content_async
+        'transport': _ENV.get('GEMINI_TRANSPORT', 'grpc_asyncio'),
+        'temperature': BaseConfig.get_env_float('GEMINI_TEMPERATURE', 0.3),
+        'max_output_tokens': BaseConfig.get_env_int('GEMINI_MAX_OUTPUT_TOKENS', 2048),
+        'top_p': BaseConfig.get_env_float('GEMINI_TOP_P', 0.8),
+        'top_k': BaseConfig.get_env_int('GEMINI_TOP_K', 40),
+        # Maximum requests in flight at once, kept under the per-minute quota
+        'max_concurrency': BaseConfig.get_env_int('GEMINI_MAX_CONCURRENCY', 10),
+        # Open the channel at init with a free count_tokens call
+        'prewarm': BaseConfig.get_env_bool('GEMINI_PREWARM', True),
+        # Documents within these limits are summarized by one batched request
+        'max_input_tokens': BaseConfig.get_env_int('GEMINI_MAX_INPUT_TOKENS', 30720),
+        'max_batch_pages': BaseConfig.get_env_int('GEMINI_MAX_BATCH_PAGES', 20),
+        # Output limit for batched requests (gemini-pro's maximum) and the share
+        # of it budgeted per summary; together they cap the pages per batch
+        'max_batch_output_tokens': BaseConfig.get_env_int('GEMINI_MAX_BATCH_OUTPUT_TOKENS', 2048),
+        'batch_output_tokens_per_page': BaseConfig.get_env_int('GEMINI_BATCH_OUTPUT_TOKENS_PER_PAGE', 256),
+        'language_settings': _LANGUAGE_SETTINGS
     }
-}
 
 # Claude Configuration
-CLAUDE_CONFIG: Dict[str, Any] = {
-    'model': 'anthropic.claude-3-5-sonnet-20240620-v1:0',
-    'temperature': BaseConfig.get_env_float('CLAUDE_TEMPERATURE', 0.2),
-    'max_output_tokens': BaseConfig.get_env_int('CLAUDE_MAX_OUTPUT_TOKENS', 2048),
-    'top_p': BaseConfig.get_env_float('CLAUDE_TOP_P', 0.8),
-    'top_k': BaseConfig.get_env_int('CLAUDE_TOP_K', 40),
-    'region': os.getenv('AWS_REGION', 'us-east-1'),
-    'aws_profile': os.getenv('AWS_PROFILE', 'default'),
-    'api_version': 'bedrock-2023-05-31',
-    'max_retries': 8,
-    'base_delay': 2.0,
-    'max_delay': 64.0,
-    'language_settings': {
-        'ja': PromptTemplates.JAPANESE,
-        'en': PromptTemplates.ENGLISH
+def _build_claude_config() -> Dict[str, Any]:
+    """Build the Claude (Bedrock) configuration"""
+    return {
+        'model': 'anthropic.claude-3-5-sonnet-20240620-v1:0',
+        'temperature': BaseConfig.get_env_float('CLAUDE_TEMPERATURE', 0.2),
+        'max_output_tokens': BaseConfig.get_env_int('CLAUDE_MAX_OUTPUT_TOKENS', 2048),
+        'top_p': BaseConfig.get_env_float('CLAUDE_TOP_P', 0.8),
+        'top_k': BaseConfig.get_env_int('CLAUDE_TOP_K', 40),
+        'region': _ENV.get('AWS_REGION', 'us-east-1'),
+        'aws_profile': _ENV.get('AWS_PROFILE', 'default'),
+        'api_version': 'bedrock-2023-05-31',
+        # Total attempts for botocore's adaptive retry mode (throttling/5xx only)
+        'max_retries': BaseConfig.get_env_int('CLAUDE_MAX_RETRIES', 8),
+        'max_concurrency': BaseConfig.get_env_int('CLAUDE_MAX_CONCURRENCY', 10),
+        'connect_timeout': BaseConfig.get_env_int('CLAUDE_CONNECT_TIMEOUT', 10),
+        'read_timeout': BaseConfig.get_env_int('CLAUDE_READ_TIMEOUT', 60),
+        # Warm-up sends billed 1-token requests, so it is opt-in
+        'prewarm': BaseConfig.get_env_bool('CLAUDE_PREWARM', False),
+        'prewarm_model': 'anthropic.claude-3-haiku-20240307-v1:0',
+        'max_input_tokens': BaseConfig.get_env_int('CLAUDE_MAX_INPUT_TOKENS', 200000),
+        'max_batch_pages': BaseConfig.get_env_int('CLAUDE_MAX_BATCH_PAGES', 20),
+        # Output limit for batched requests (the model's maximum on Bedrock) and
+        # the share of it budgeted per summary; together they cap the pages per batch
+        'max_batch_output_tokens': BaseConfig.get_env_int('CLAUDE_MAX_BATCH_OUTPUT_TOKENS', 4096),
+        'batch_output_tokens_per_page': BaseConfig.get_env_int('CLAUDE_BATCH_OUTPUT_TOKENS_PER_PAGE', 256),
+        # Offline batch inference (create_model_invocation_job) for high-volume runs
+        'use_batch_api': BaseConfig.get_env_bool('CLAUDE_USE_BATCH_API', False),
+        'batch_role_arn': _ENV.get('CLAUDE_BATCH_ROLE_ARN', ''),
+        'batch_s3_uri': _ENV.get('CLAUDE_BATCH_S3_URI', ''),  # s3://bucket/prefix/
+        'batch_poll_interval': BaseConfig.get_env_int('CLAUDE_BATCH_POLL_INTERVAL', 60),
+        # Seconds to wait for a batch job before stopping it
+        'batch_timeout': BaseConfig.get_env_int('CLAUDE_BATCH_TIMEOUT', 24 * 60 * 60),
+        'language_settings': _LANGUAGE_SETTINGS
     }
+
+# -----------------------------------------------------------------------------
+# Lazy configuration access
+# -----------------------------------------------------------------------------
+
+# Per-provider configs are only built when first accessed, so importing the
+# Vision pipeline does not pay for Claude/Gemini settings and vice versa
+_LAZY_CONFIG_BUILDERS = {
+    'VISION_CONFIG': _build_vision_config,
+    'GEMINI_CONFIG': _build_gemini_config,
+    'CLAUDE_CONFIG': _build_claude_config,
 }
+_lazy_config_cache: Dict[str, Dict[str, Any]] = {}
+
+def __getattr__(name: str) -> Dict[str, Any]:
+    """Build and cache lazily-loaded configuration dicts (PEP 562)"""
+    builder = _LAZY_CONFIG_BUILDERS.get(name)
+    if builder is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    if name not in _lazy_config_cache:
+        _lazy_config_cache[name] = builder()
+    return _lazy_config_cache[name]
@@ -1,192 +1,315 @@
-import json
+import asyncio
+import atexit
+import orjson
 import logging
-from typing import Dict, Any, Optional
-import boto3
-from config import CLAUDE_CONFIG, LOGGING_CONFIG
-import random
 import time
+import uuid
+from functools import lru_cache, partial
+from typing import Dict, Any, Optional, Tuple
+import boto3
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from config import CLAUDE_CONFIG, SECURITY_CONFIG
+from src.generative.base.llm_base import LLMBase, ResponseTruncatedError, language_confidence
 
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['level']),
-    format=LOGGING_CONFIG['format']
-)
 logger = logging.getLogger(__name__)
 
-class ClaudeProcessor:
+# Process-wide Bedrock client so every ClaudeProcessor reuses the same
+# connection pool instead of paying a new TLS handshake per instance
+_BEDROCK_CLIENT = None
+
+# Batch job states after which polling stops
+_BATCH_TERMINAL_STATES = frozenset({
+    'Completed', 'PartiallyCompleted', 'Failed', 'Stopped', 'Expired'
+})
+
+# Request semaphore per event loop, shared by every ClaudeProcessor so that
+# max_concurrency caps the whole process; an asyncio.Semaphore only works on
+# the loop it was first used on
+_REQUEST_SEMAPHORES: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+def _get_request_semaphore() -> asyncio.Semaphore:
+    """Return the running loop's request semaphore, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    semaphore = _REQUEST_SEMAPHORES.get(loop)
+    if semaphore is None:
+        for stale_loop in [other for other in _REQUEST_SEMAPHORES if other.is_closed()]:
+            del _REQUEST_SEMAPHORES[stale_loop]
+        semaphore = asyncio.Semaphore(CLAUDE_CONFIG['max_concurrency'])
+        _REQUEST_SEMAPHORES[loop] = semaphore
+    return semaphore
+
+@lru_cache(maxsize=1)
+def _get_boto3_session() -> boto3.Session:
+    """Return the boto3 session shared by all Bedrock and S3 clients"""
+    return boto3.Session(
+        profile_name=CLAUDE_CONFIG['aws_profile'],
+        region_name=CLAUDE_CONFIG.get('region', 'us-east-1')
+    )
+
+def _get_bedrock_client():
+    """Return the shared Bedrock runtime client, creating it on first use"""
+    global _BEDROCK_CLIENT
+    if _BEDROCK_CLIENT is None:
+        session = _get_boto3_session()
+        # Size the urllib3 pool to the concurrency cap so parallel pages reuse
+        # warm keep-alive connections instead of opening new TLS sessions
+        client_config = Config(
+            max_pool_connections=CLAUDE_CONFIG['max_concurrency'],
+            tcp_keepalive=True,
+            connect_timeout=CLAUDE_CONFIG['connect_timeout'],
+            read_timeout=CLAUDE_CONFIG['read_timeout'],
+            # Adaptive mode retries only throttling and 5xx errors and shares a
+            # client-side rate limiter across all concurrent calls
+            retries={'max_attempts': CLAUDE_CONFIG['max_retries'], 'mode': 'adaptive'}
+        )
+        _BEDROCK_CLIENT = session.client('bedrock-runtime', config=client_config)
+    return _BEDROCK_CLIENT
+
+@atexit.register
+def _close_bedrock_client():
+    """Close the shared Bedrock client; the next _get_bedrock_client() call recreates it"""
+    global _BEDROCK_CLIENT
+    if _BEDROCK_CLIENT is not None:
+        _BEDROCK_CLIENT.close()
+        _BEDROCK_CLIENT = None
+
+class ClaudeProcessor(LLMBase):
     """Claude processor for generating document summaries"""
 
+    __slots__ = ('bedrock_client', '_request_template', '_invoke_model_stream')
+
     def __init__(self):
         """Initialize Claude model with configurations"""
+        self._config = CLAUDE_CONFIG
+        self._init_language_settings(CLAUDE_CONFIG['language_settings'], 'ja')
+
+        # Fixed part of every request; only 'messages' changes per call
+        self._request_template = {
+            "anthropic_version": CLAUDE_CONFIG['api_version'],
+            "max_tokens": CLAUDE_CONFIG['max_output_tokens'],
+            "temperature": CLAUDE_CONFIG['temperature'],
+            "top_p": CLAUDE_CONFIG['top_p'],
+            "top_k": CLAUDE_CONFIG['top_k'],
+        }
         try:
-            session = boto3.Session(
-                profile_name=CLAUDE_CONFIG['aws_profile'],
-                region_name=CLAUDE_CONFIG.get('region', 'us-east-1')
+            self.bedrock_client = _get_bedrock_client()
+            self._invoke_model_stream = partial(
+                self.bedrock_client.invoke_model_with_response_stream,
+                modelId=CLAUDE_CONFIG['model']
             )
-            self.bedrock_client = session.client('bedrock-runtime')
             logger.info("Successfully initialized Bedrock client")
+            if CLAUDE_CONFIG['prewarm']:
+                self._start_prewarm()
         except Exception as e:
             logger.error(f"Failed to initialize Bedrock client: {str(e)}")
             raise
 
-    def process_ocr_data(self, ocr_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """Process OCR data and generate summaries"""
-        try:
-            if not ocr_data.get('responses'):
-                logger.error("OCR data missing 'responses' key")
-                return None
-
-            pages = ocr_data['responses'][0].get('pages', [])
-            if not pages:
-                logger.error("No pages found in OCR data")
-                return None
-
-            # Get primary language from the first page
-            primary_lang = self._get_primary_language(pages[0])
-
-            # Get language settings
-            language_settings = CLAUDE_CONFIG['language_settings'].get(
-                primary_lang,
-                CLAUDE_CONFIG['language_settings']['ja']
+    async def _prewarm_async(self) -> None:
+        """Fill the connection pool with one keep-alive socket per concurrency slot"""
+        body = orjson.dumps({
+            "anthropic_version": CLAUDE_CONFIG['api_version'],
+            "max_tokens": 1,
+            "messages": [{"role": "user", "content": "ping"}]
+        })
+        await asyncio.gather(*(
+            asyncio.to_thread(
+                self.bedrock_client.invoke_model,
+                modelId=CLAUDE_CONFIG['prewarm_model'],
+                body=body
             )
+            for _ in range(CLAUDE_CONFIG['max_concurrency'])
+        ))
 
-            summaries = []
-            # Process each page individually
-            for page in pages:
-                if page.get('text'):
-                    page_summary = self._generate_page_summary(
-                        page['text'],
-                        page['page_number'],
-                        language_settings
-                    )
-                    if page_summary:
-                        summaries.append({
-                            'page_number': page['page_number'],
-                            'summary': page_summary
-                        })
-
-            # Generate overall summary if there are multiple pages
-            overall_summary = None
-            if len(summaries) > 1:
-                combined_text = '\n'.join([s['summary'] for s in summaries])
-                overall_summary = self._generate_overall_summary(
-                    combined_text,
-                    language_settings
-                )
-
-            return {
-                'page_summaries': summaries,
-                'overall_summary': overall_summary,
-                'metadata': {
-                    'total_pages': len(summaries),
-                    'primary_language': primary_lang
-                }
-            }
+    def close(self) -> None:
+        """
+        Release this processor's handles on the Bedrock client
 
-        except Exception as e:
-            logger.error(f"Error processing OCR data: {str(e)}")
-            return None
+        The client itself is shared by every ClaudeProcessor, so it stays open
+        for the others and is closed by the atexit hook.
+        """
+        self.bedrock_client = None
+        self._invoke_model_stream = None
 
-    def _generate_page_summary(
+    def _detect_primary_language(self, pages: list[Dict[str, Any]]) -> str:
+        """Get primary language from the first page"""
+        return self._get_primary_language(pages[0])
+
+    async def _generate_text_async(
         self,
-        text: str,
-        page_number: int,
-        language_settings: Dict[str, Any]
+        prompt: str,
+        max_output_tokens: Optional[int] = None
     ) -> Optional[str]:
-        """Generate summary for a single page with retry logic"""
+        """Send a prompt to Claude and return the generated text"""
+        request = {
+            **self._request_template,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ]
+        }
+        if max_output_tokens is not None:
+            request["max_tokens"] = max_output_tokens
+        body = orjson.dumps(request)
+
         try:
-            prompt = language_settings['summary'].format(text=text)
-            response = self._invoke_claude_with_retry(prompt)
-            if response:
-                return response.strip()
+            # boto3 is blocking; run it on a worker thread so other pages proceed
+            async with _get_request_semaphore():
+                response, stop_reason = await asyncio.to_thread(self._invoke_claude, body)
+        except ClientError as e:
+            logger.error(
+                f"Bedrock rejected the request ({e.response['Error']['Code']}): {str(e)}"
+            )
             return None
-
-        except Exception as e:
-            logger.error(f"Error generating summary for page {page_number}: {str(e)}")
+        except (BotoCoreError, KeyError, IndexError, ValueError) as e:
+            logger.error(f"Failed to invoke Claude: {str(e)}")
             return None
 
-    def _generate_overall_summary(
-        self,
-        combined_summaries: str,
-        language_settings: Dict[str, Any]
-    ) -> Optional[str]:
-        """Generate overall summary from page summaries with retry logic"""
+        if stop_reason == 'max_tokens':
+            raise ResponseTruncatedError(response.strip())
+        if response:
+            return response.strip()
+        return None
+
+    def _invoke_claude(self, body: bytes) -> Tuple[str, Optional[str]]:
+        """Send a serialized request to Claude and return the generated text and stop reason (blocking)"""
+        # Tokens are consumed as they are generated rather than after one large read
+        response = self._invoke_model_stream(body=body)
+        parts = []
+        stop_reason = None
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if chunk is None:
+                continue
+            data = orjson.loads(chunk['bytes'])
+            event_type = data.get('type')
+            if event_type == 'content_block_delta':
+                parts.append(data['delta'].get('text', ''))
+            elif event_type == 'message_delta':
+                stop_reason = data['delta'].get('stop_reason', stop_reason)
+        return ''.join(parts), stop_reason
+
+    def _run_batch_job(self, prompts: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """Run the prompts as a Bedrock batch inference job and return the outputs"""
+        job_name = f"ocr-summary-{uuid.uuid4().hex}"
         try:
-            prompt = language_settings['summary'].format(text=combined_summaries)
-            response = self._invoke_claude_with_retry(prompt)
-            if response:
-                return response.strip()
-            return None
+            job_arn, output_uri = self._submit_batch_job(job_name, prompts)
+            status = self._poll_batch_job(job_arn)
+            if status not in ('Completed', 'PartiallyCompleted'):
+                logger.error(f"Batch job {job_arn} ended with status {status}")
+                return {}
+            outputs = self._fetch_batch_job(job_arn, output_uri)
+            logger.info(f"Batch job {job_arn} returned {len(outputs)}/{len(prompts)} results")
+            return outputs
+        except (BotoCoreError, ClientError, ValueError) as e:
+            logger.error(f"Bedrock batch job failed: {str(e)}")
+            return {}
+        finally:
+            # The manifest and results hold document text; everything the job
+            # wrote lives under its own prefix
+            if SECURITY_CONFIG['delete_after_processing']:
+                self._delete_batch_objects(job_name)
 
-        except Exception as e:
-            logger.error(f"Error generating overall summary: {str(e)}")
-            return None
+    def _delete_batch_objects(self, job_name: str) -> None:
+        """Delete the input manifest and every output object of a batch job"""
+        try:
+            bucket, prefix = self._split_s3_uri(CLAUDE_CONFIG['batch_s3_uri'])
+            s3 = _get_boto3_session().client('s3')
+            paginator = s3.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=bucket, Prefix=f"{prefix}{job_name}/"):
+                keys = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+                if keys:
+                    s3.delete_objects(Bucket=bucket, Delete={'Objects': keys, 'Quiet': True})
+        except (BotoCoreError, ClientError, ValueError) as e:
+            logger.warning(f"Failed to delete batch job objects for {job_name}: {str(e)}")
+
+    def _submit_batch_job(self, job_name: str, prompts: Dict[str, str]) -> tuple[str, str]:
+        """Upload the prompts as a JSONL manifest and start the invocation job"""
+        bucket, prefix = self._split_s3_uri(CLAUDE_CONFIG['batch_s3_uri'])
+        input_key = f"{prefix}{job_name}/input.jsonl"
+        output_uri = f"s3://{bucket}/{prefix}{job_name}/output/"
 
-    def _invoke_claude_with_retry(self, prompt: str) -> Optional[str]:
-        """Send request to Claude model with improved exponential backoff retry"""
-        max_retries = CLAUDE_CONFIG['max_retries']
-        base_delay = CLAUDE_CONFIG['base_delay']
-        max_delay = CLAUDE_CONFIG['max_delay']
-
-        for attempt in range(max_retries):
-            try:
-                request_body = {
-                    "anthropic_version": CLAUDE_CONFIG['api_version'],
-                    "max_tokens": CLAUDE_CONFIG['max_output_tokens'],
-                    "temperature": CLAUDE_CONFIG['temperature'],
-                    "top_p": CLAUDE_CONFIG['top_p'],
-                    "top_k": CLAUDE_CONFIG['top_k'],
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ]
+        manifest = b'\n'.join(
+            orjson.dumps({
+                "recordId": record_id,
+                "modelInput": {
+                    **self._request_template,
+                    # Every record is a batched-JSON prompt
+                    "max_tokens": CLAUDE_CONFIG['max_batch_output_tokens'],
+                    "messages": [{"role": "user", "content": prompt}]
                 }
+            })
+            for record_id, prompt in prompts.items()
+        )
+        session = _get_boto3_session()
+        session.client('s3').put_object(Bucket=bucket, Key=input_key, Body=manifest)
+
+        response = session.client('bedrock').create_model_invocation_job(
+            jobName=job_name,
+            roleArn=CLAUDE_CONFIG['batch_role_arn'],
+            modelId=CLAUDE_CONFIG['model'],
+            inputDataConfig={'s3InputDataConfig': {'s3Uri': f"s3://{bucket}/{input_key}"}},
+            outputDataConfig={'s3OutputDataConfig': {'s3Uri': output_uri}}
+        )
+        logger.info(f"Submitted batch job {response['jobArn']} with {len(prompts)} records")
+        return response['jobArn'], output_uri
+
+    def _poll_batch_job(self, job_arn: str) -> str:
+        """Block until the invocation job reaches a terminal state or the deadline, and return its status"""
+        bedrock = _get_boto3_session().client('bedrock')
+        deadline = time.monotonic() + CLAUDE_CONFIG['batch_timeout']
+        while True:
+            status = bedrock.get_model_invocation_job(jobIdentifier=job_arn)['status']
+            if status in _BATCH_TERMINAL_STATES:
+                return status
+            if time.monotonic() >= deadline:
+                logger.error(f"Batch job {job_arn} did not finish in time; stopping it")
+                bedrock.stop_model_invocation_job(jobIdentifier=job_arn)
+                return 'TimedOut'
+            logger.info(f"Batch job {job_arn} is {status}")
+            time.sleep(CLAUDE_CONFIG['batch_poll_interval'])
+
+    def _fetch_batch_job(self, job_arn: str, output_uri: str) -> Dict[str, str]:
+        """Read the job's JSONL output and map record ids to generated text"""
+        bucket, prefix = self._split_s3_uri(output_uri)
+        # Bedrock writes results under <output uri>/<job id>/<input file>.out
+        job_id = job_arn.rsplit('/', 1)[-1]
+        body = _get_boto3_session().client('s3').get_object(
+            Bucket=bucket,
+            Key=f"{prefix}{job_id}/input.jsonl.out"
+        )['Body'].read()
+
+        outputs = {}
+        for line in body.splitlines():
+            if not line.strip():
+                continue
+            record = orjson.loads(line)
+            model_output = record.get('modelOutput')
+            # Output cut off at the token limit is left out, so the document
+            # goes through the interactive path instead
+            if model_output and model_output.get('content') and model_output.get('stop_reason') != 'max_tokens':
+                outputs[record['recordId']] = model_output['content'][0]['text']
+        return outputs
 
-                response = self.bedrock_client.invoke_model(
-                    modelId=CLAUDE_CONFIG['model'],
-                    body=json.dumps(request_body)
-                )
-
-                response_body = json.loads(response['body'].read())
-                return response_body['content'][0]['text']
-
-            except Exception as e:
-                if 'ThrottlingException' in str(e):
-                    delay = min(base_delay * (2 ** attempt), max_delay)
-                    jitter = random.uniform(0, 0.3 * delay)
-                    total_delay = delay + jitter
-
-                    if attempt < max_retries - 1:
-                        logger.warning(
-                            f"Rate limit hit on attempt {attempt + 1}: {str(e)}. "
-                            f"Waiting {total_delay:.2f} seconds..."
-                        )
-                        time.sleep(total_delay)
-                    else:
-                        logger.error(
-                            f"Failed all {max_retries} attempts to invoke Claude. "
-                            f"Last error: {str(e)}"
-                        )
-                        return None
-                else:
-                    logger.error(f"Unexpected error on attempt {attempt + 1}: {str(e)}")
-                    if attempt == max_retries - 1:
-                        return None
-                    time.sleep(base_delay)
+    @staticmethod
+    def _split_s3_uri(uri: str) -> tuple[str, str]:
+        """Split s3://bucket/prefix/ into bucket and prefix (with trailing slash)"""
+        if not uri.startswith('s3://'):
+            raise ValueError(f"Invalid S3 URI for batch jobs: {uri!r}")
+        bucket, _, prefix = uri[len('s3://'):].partition('/')
+        if prefix and not prefix.endswith('/'):
+            prefix += '/'
+        return bucket, prefix
 
     def _get_primary_language(self, page: Dict[str, Any]) -> str:
         """Get primary language from page data"""
         try:
             if page.get('detected_languages'):
                 # Get the highest confidence language
-                langs = sorted(
-                    page['detected_languages'],
-                    key=lambda x: x.get('confidence', 0),
-                    reverse=True
-                )
-                if langs:
-                    return langs[0]['language_code']
+                top = max(page['detected_languages'], key=language_confidence)
+                return top['language_code']
             return 'ja'  # Default to Japanese if no language detected
 
         except Exception as e:
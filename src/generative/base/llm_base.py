@@ -0,0 +1,743 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import orjson
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from functools import lru_cache
+from operator import itemgetter
+from typing import AbstractSet, Awaitable, Callable, Dict, Any, List, Literal, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# 'batched' sends one JSON-returning request per document (falling back to
+# per-page requests when it does not fit); 'per_page' always sends one
+# request per distinct page plus one for the overall summary
+SummaryMode = Literal['per_page', 'batched']
+
+# One event loop, kept alive on a daemon thread, drives every async LLM call.
+# SDK async clients bind to the loop they were first used on, so a fresh
+# asyncio.run() per call would leave them attached to a closed loop.
+_EVENT_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_EVENT_LOOP_LOCK = threading.Lock()
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the shared background event loop, starting it on first use"""
+    global _EVENT_LOOP
+    with _EVENT_LOOP_LOCK:
+        if _EVENT_LOOP is None:
+            _EVENT_LOOP = asyncio.new_event_loop()
+            threading.Thread(
+                target=_EVENT_LOOP.run_forever,
+                name='llm-event-loop',
+                daemon=True
+            ).start()
+    return _EVENT_LOOP
+
+def run_coroutine_sync(coro: Awaitable[T]) -> T:
+    """Run a coroutine on the shared event loop and block until it completes"""
+    loop = _get_event_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        # Blocking here would wait on work scheduled behind us forever
+        coro.close()
+        raise RuntimeError("Use the *_async methods from code already running on the LLM event loop")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+# Boundaries tried in order when splitting oversized page text
+_CHUNK_SEPARATORS = ('\n\n', '\n', '。', '. ', ' ')
+
+class ResponseTruncatedError(Exception):
+    """The model stopped generating because it reached the output token limit"""
+
+    def __init__(self, text: str):
+        super().__init__("Response stopped at the output token limit")
+        # Whatever was generated before the cutoff
+        self.text = text
+
+def language_confidence(language: Dict[str, Any]) -> float:
+    """Ranking key for detected_languages entries"""
+    return language.get('confidence', 0)
+
+@lru_cache(maxsize=None)
+def _compile_prompt_template(template: str) -> Callable[[str], str]:
+    """Split a '{text}' template once so building each prompt is a plain concatenation"""
+    prefix, placeholder, suffix = template.partition('{text}')
+    if not placeholder or '{' in prefix + suffix.replace('{{', '').replace('}}', ''):
+        # Other placeholders present; keep full str.format semantics
+        return lambda text: template.format(text=text)
+    prefix = prefix.replace('{{', '{').replace('}}', '}')
+    suffix = suffix.replace('{{', '{').replace('}}', '}')
+    return lambda text: prefix + text + suffix
+
+def _log_prewarm_result(future) -> None:
+    """Report a failed warm-up without letting it surface to the caller"""
+    if not future.cancelled() and future.exception() is not None:
+        logger.debug(f"Connection pre-warm failed: {str(future.exception())}")
+
+class LLMBase(ABC):
+    """Base class for generative AI processors that summarize OCR data"""
+
+    __slots__ = ('_config', '_language_settings', '_default_language_settings')
+
+    # Upper bound on documents summarized in parallel by process_ocr_data_list
+    max_concurrency: int = 8
+
+    # Summaries combined per request when reducing page summaries to an overall summary
+    summary_fan_in: int = 8
+
+    # Responses keyed by sha256(model + prompt), shared by every processor in
+    # the process; OCR output is deterministic, so re-runs hit this cache.
+    # Only touched from the shared event loop thread, so no lock is needed.
+    summary_cache_size: int = 1024
+    _summary_cache: 'OrderedDict[str, str]' = OrderedDict()
+
+    def _init_language_settings(
+        self,
+        language_settings: Dict[str, Dict[str, Any]],
+        default_language: str
+    ) -> None:
+        """Resolve the per-language prompt settings once at construction time"""
+        self._language_settings = language_settings
+        self._default_language_settings = language_settings[default_language]
+
+    def _get_language_settings(self, language: str) -> Dict[str, Any]:
+        """Get prompt settings for a language, falling back to the default language"""
+        return self._language_settings.get(language, self._default_language_settings)
+
+    @abstractmethod
+    async def _generate_text_async(
+        self,
+        prompt: str,
+        max_output_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Send a prompt to the model and return the generated text, or None on failure
+
+        Args:
+            prompt: Prompt text
+            max_output_tokens: Output limit for this request (default: the configured one)
+
+        Raises:
+            ResponseTruncatedError: Generation stopped at the output token limit
+        """
+
+    async def _generate_text_cached_async(
+        self,
+        prompt: str,
+        max_output_tokens: Optional[int] = None,
+        allow_truncated: bool = True,
+        cache_response: bool = True
+    ) -> Optional[str]:
+        """
+        Return a cached response for the prompt, calling the model only on a miss
+
+        A response cut off at the output token limit is returned (and cached)
+        as is when allow_truncated is set; otherwise ResponseTruncatedError
+        propagates and nothing is cached. Callers that must validate the
+        response first pass cache_response=False and call _cache_response
+        once it checks out.
+        """
+        key = self._summary_cache_key(prompt)
+        cache = LLMBase._summary_cache
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+
+        try:
+            response = await self._generate_text_async(prompt, max_output_tokens)
+        except ResponseTruncatedError as e:
+            if not allow_truncated:
+                raise
+            response = e.text
+        if response and cache_response:
+            self._cache_response(prompt, response)
+        return response
+
+    def _summary_cache_key(self, prompt: str) -> str:
+        """Key a prompt by the model it is sent to"""
+        return hashlib.sha256(f"{self._config['model']}\0{prompt}".encode()).hexdigest()
+
+    def _cache_response(self, prompt: str, response: str) -> None:
+        """Store a response in the shared summary cache, evicting the oldest entry when full"""
+        cache = LLMBase._summary_cache
+        cache[self._summary_cache_key(prompt)] = response
+        if len(cache) > self.summary_cache_size:
+            cache.popitem(last=False)
+
+    @abstractmethod
+    def _detect_primary_language(self, pages: List[Dict[str, Any]]) -> str:
+        """Determine the language used to pick prompt settings for a document"""
+
+    def process_ocr_data(
+        self,
+        ocr_data: Dict[str, Any],
+        mode: SummaryMode = 'batched'
+    ) -> Optional[Dict[str, Any]]:
+        """Generate summaries from OCR data (blocking wrapper around process_ocr_data_async)"""
+        return run_coroutine_sync(self.process_ocr_data_async(ocr_data, mode))
+
+    async def process_ocr_data_async(
+        self,
+        ocr_data: Dict[str, Any],
+        mode: SummaryMode = 'batched'
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Generate summaries from OCR data
+
+        In 'batched' mode all pages are summarized by a single request that
+        returns JSON; documents too large for one request fall back to
+        concurrent per-page requests followed by an overall summary. 'per_page'
+        mode always takes the per-page route.
+
+        Args:
+            ocr_data: Dictionary containing OCR results
+            mode: Summarization strategy, 'batched' or 'per_page'
+
+        Returns:
+            Dictionary containing summaries and metadata
+        """
+        try:
+            document = self._prepare_document(ocr_data)
+            if document is None:
+                return None
+            primary_lang, language_settings, text_pages = document
+
+            result = None
+            if mode == 'batched' and text_pages and self._fits_single_request(text_pages):
+                result = await self._summarize_batched_async(text_pages, language_settings)
+            if result is None:
+                result = await self._summarize_per_page_async(text_pages, language_settings)
+            return self._build_summary_result(*result, primary_lang)
+
+        except Exception as e:
+            logger.error(f"Error generating summary: {str(e)}")
+            return None
+
+    def _prepare_document(
+        self,
+        ocr_data: Dict[str, Any]
+    ) -> Optional[Tuple[str, Dict[str, Any], List[Dict[str, Any]]]]:
+        """Extract the pages with text and resolve the prompt settings for a document"""
+        # Extract pages from the correct location in JSON structure
+        if not ocr_data.get('responses'):
+            logger.error("OCR data missing 'responses' key")
+            return None
+
+        pages = ocr_data['responses'][0].get('pages', [])
+        if not pages:
+            logger.error("No pages found in OCR data")
+            return None
+
+        primary_lang = self._detect_primary_language(pages)
+        language_settings = self._get_language_settings(primary_lang)
+        text_pages = [page for page in pages if page.get('text')]
+        return primary_lang, language_settings, text_pages
+
+    @staticmethod
+    def _build_summary_result(
+        summaries: List[Dict[str, Any]],
+        overall_summary: Optional[str],
+        primary_lang: str
+    ) -> Dict[str, Any]:
+        """Assemble the summary dictionary returned to callers"""
+        return {
+            'page_summaries': summaries,
+            'overall_summary': overall_summary,
+            'metadata': {
+                'total_pages': len(summaries),
+                'primary_language': primary_lang
+            }
+        }
+
+    @staticmethod
+    def _estimate_tokens(text: str) -> int:
+        """Rough token count: ~4 ASCII characters per token, one token per other character"""
+        ascii_chars = len(text.encode('ascii', 'ignore'))
+        return len(text) - ascii_chars + ascii_chars // 4
+
+    @classmethod
+    def _split_text(
+        cls,
+        text: str,
+        max_tokens: int,
+        separators: Optional[Tuple[str, ...]] = None
+    ) -> List[str]:
+        """Split text into chunks of at most ~max_tokens, preferring paragraph then sentence breaks"""
+        if cls._estimate_tokens(text) <= max_tokens:
+            return [text]
+        if separators is None:
+            separators = _CHUNK_SEPARATORS
+
+        for index, separator in enumerate(separators):
+            if separator in text:
+                break
+        else:
+            # No natural boundary left
+            return cls._cut_text(text, max_tokens)
+
+        # Keep each separator with the part before it so no text is lost
+        parts = text.split(separator)
+        parts = [part + separator for part in parts[:-1]] + [parts[-1]]
+        chunks: List[str] = []
+        current: List[str] = []
+        # The estimate is taken over the accumulated text: summing per-part
+        # estimates would floor every short ASCII part to almost nothing
+        current_chars = current_ascii = 0
+        for part in parts:
+            part_ascii = len(part.encode('ascii', 'ignore'))
+            chars, ascii_chars = current_chars + len(part), current_ascii + part_ascii
+            if current and chars - ascii_chars + ascii_chars // 4 > max_tokens:
+                chunks.append(''.join(current))
+                current = []
+                chars, ascii_chars = len(part), part_ascii
+            current.append(part)
+            current_chars, current_ascii = chars, ascii_chars
+        if current:
+            chunks.append(''.join(current))
+
+        # A single part can still be too large; split it on the finer boundaries
+        finer = separators[index + 1:]
+        return [
+            piece
+            for chunk in chunks
+            for piece in cls._split_text(chunk, max_tokens, finer)
+        ]
+
+    @classmethod
+    def _cut_text(cls, text: str, max_tokens: int) -> List[str]:
+        """Cut text into the longest pieces within max_tokens, ending at whitespace when there is any"""
+        max_tokens = max(1, max_tokens)
+        pieces: List[str] = []
+        start = 0
+        while start < len(text):
+            # A character costs between a quarter and one token, so the longest
+            # piece within the budget ends between these bounds
+            low = min(len(text), start + max_tokens)
+            high = min(len(text), start + 4 * max_tokens + 3)
+            while low < high:
+                mid = (low + high + 1) // 2
+                if cls._estimate_tokens(text[start:mid]) <= max_tokens:
+                    low = mid
+                else:
+                    high = mid - 1
+            end = low
+            if end < len(text):
+                space = max(text.rfind(char, start, end) for char in ' \t\n\r')
+                if space > start:
+                    end = space + 1
+            pieces.append(text[start:end])
+            start = end
+        return pieces
+
+    def _fits_single_request(self, pages: List[Dict[str, Any]]) -> bool:
+        """Check whether every page can be summarized in one batched request"""
+        if len(pages) > self._max_batch_pages():
+            return False
+        total_tokens = sum(self._estimate_tokens(page['text']) for page in pages)
+        return total_tokens <= self._config['max_input_tokens']
+
+    def _max_batch_pages(self) -> int:
+        """
+        Pages allowed in one batched request
+
+        Besides max_batch_pages, every page summary and the overall summary
+        must fit the batched request's output limit, or the JSON is cut off.
+        """
+        config = self._config
+        output_page_limit = config['max_batch_output_tokens'] // config['batch_output_tokens_per_page'] - 1
+        return min(config['max_batch_pages'], output_page_limit)
+
+    @staticmethod
+    def _build_batched_prompt(
+        pages: List[Dict[str, Any]],
+        language_settings: Dict[str, Any]
+    ) -> str:
+        """Build the single prompt that asks for every page summary as JSON"""
+        page_marker = language_settings['page_marker']
+        document = '\n\n'.join(
+            f"{page_marker.format(page_number=page['page_number'])}\n{page['text']}"
+            for page in pages
+        )
+        return _compile_prompt_template(language_settings['batch_summary'])(document)
+
+    async def _summarize_batched_async(
+        self,
+        pages: List[Dict[str, Any]],
+        language_settings: Dict[str, Any]
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Summarize all pages with one JSON-returning request; None if it cannot be parsed
+
+        A reply that leaves pages out is retried like malformed JSON; if the
+        retry is still incomplete, the missing pages are summarized one by one.
+        """
+        prompt = self._build_batched_prompt(pages, language_settings)
+        max_output_tokens = self._config['max_batch_output_tokens']
+        page_numbers = {page['page_number'] for page in pages}
+        partial = None
+
+        # One retry with a stricter instruction before giving up on the batch
+        for attempt_prompt in (prompt, prompt + language_settings['json_retry_suffix']):
+            try:
+                response = await self._generate_text_cached_async(
+                    attempt_prompt,
+                    max_output_tokens,
+                    allow_truncated=False,
+                    cache_response=False
+                )
+            except ResponseTruncatedError:
+                # A stricter instruction cannot make the output fit; go
+                # straight to per-page requests
+                logger.warning("Batched summary reached the output token limit; falling back to per-page summaries")
+                return None
+            if not response:
+                return None
+            parsed = self._parse_batched_response(response, page_numbers)
+            if parsed is None:
+                logger.warning("Batched summary response was not valid JSON")
+                continue
+            if len(parsed[0]) == len(page_numbers):
+                # Cached only once it is complete, so a bad reply is retried on later runs
+                self._cache_response(attempt_prompt, response)
+                return parsed
+            logger.warning(
+                f"Batched summary covered {len(parsed[0])} of {len(page_numbers)} pages"
+            )
+            partial = parsed
+
+        if partial is None:
+            logger.warning("Falling back to per-page summaries")
+            return None
+
+        summaries, overall_summary = partial
+        summarized = set(map(itemgetter('page_number'), summaries))
+        missing_pages = [page for page in pages if page['page_number'] not in summarized]
+        logger.warning(f"Summarizing {len(missing_pages)} missing pages one by one")
+        build_prompt = _compile_prompt_template(language_settings['summary'])
+        summaries = sorted(
+            summaries + await self._summarize_pages_async(missing_pages, build_prompt),
+            key=itemgetter('page_number')
+        )
+        if overall_summary is None and len(summaries) > 1:
+            overall_summary = await self._reduce_summaries_async(
+                list(map(itemgetter('summary'), summaries)),
+                build_prompt
+            )
+        return summaries, overall_summary
+
+    @staticmethod
+    def _parse_batched_response(
+        response: str,
+        page_numbers: AbstractSet[int]
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[str]]]:
+        """
+        Extract page summaries and the overall summary from a JSON model response
+
+        Returns None when the JSON is malformed or names a page twice or a
+        page that was not sent; pages the reply leaves out are simply absent.
+        """
+        # Models sometimes wrap the object in a Markdown code fence
+        start, end = response.find('{'), response.rfind('}')
+        if start == -1 or end < start:
+            return None
+        try:
+            data = orjson.loads(response[start:end + 1])
+            summaries = [
+                {
+                    'page_number': int(item['page_number']),
+                    'summary': item['summary'].strip()
+                }
+                for item in data['page_summaries']
+                if item.get('summary')
+            ]
+        except (orjson.JSONDecodeError, KeyError, TypeError, ValueError, AttributeError):
+            return None
+
+        returned = [summary['page_number'] for summary in summaries]
+        if len(set(returned)) != len(returned) or not page_numbers.issuperset(returned):
+            return None
+
+        overall_summary = data.get('overall_summary') if len(summaries) > 1 else None
+        if isinstance(overall_summary, str):
+            overall_summary = overall_summary.strip() or None
+        else:
+            overall_summary = None
+        return summaries, overall_summary
+
+    async def _summarize_per_page_async(
+        self,
+        pages: List[Dict[str, Any]],
+        language_settings: Dict[str, Any]
+    ) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Summarize pages with concurrent requests, then combine them into an overall summary"""
+        # Resolve the prompt builder once per document instead of once per page
+        build_prompt = _compile_prompt_template(language_settings['summary'])
+        summaries = await self._summarize_pages_async(pages, build_prompt)
+
+        # Generate overall summary if there are multiple pages
+        overall_summary = None
+        if len(summaries) > 1:
+            overall_summary = await self._reduce_summaries_async(
+                list(map(itemgetter('summary'), summaries)),
+                build_prompt
+            )
+        return summaries, overall_summary
+
+    async def _summarize_pages_async(
+        self,
+        pages: List[Dict[str, Any]],
+        build_prompt: Callable[[str], str]
+    ) -> List[Dict[str, Any]]:
+        """Summarize each page with its own request, skipping pages that fail"""
+        # Only pages that would not fit the model's input alongside the prompt
+        # wording are split; anything smaller is summarized in one call
+        max_page_tokens = self._config['max_input_tokens'] - self._estimate_tokens(build_prompt(''))
+        # Scanned forms repeat pages (blanks, boilerplate); summarize each
+        # distinct text once and share the result with every page that has it
+        unique_pages: Dict[str, Dict[str, Any]] = {}
+        for page in pages:
+            unique_pages.setdefault(page['text'], page)
+        results = await asyncio.gather(
+            *(
+                self._generate_page_summary_async(
+                    text,
+                    page['page_number'],
+                    build_prompt,
+                    max_page_tokens
+                )
+                for text, page in unique_pages.items()
+            ),
+            return_exceptions=True
+        )
+        summary_by_text = {
+            text: page_summary
+            for text, page_summary in zip(unique_pages, results)
+            if page_summary and not isinstance(page_summary, BaseException)
+        }
+        return [
+            {
+                'page_number': page['page_number'],
+                'summary': summary_by_text[page['text']]
+            }
+            for page in pages
+            if page['text'] in summary_by_text
+        ]
+
+    async def _reduce_summaries_async(
+        self,
+        texts: List[str],
+        build_prompt: Callable[[str], str]
+    ) -> Optional[str]:
+        """
+        Fold summaries into one overall summary, summary_fan_in at a time
+
+        Every level summarizes its groups concurrently, so prompt size stays
+        bounded and the critical path is O(log N) calls instead of one call
+        whose prompt grows with the page count.
+        """
+        fan_in = self.summary_fan_in
+        while len(texts) > fan_in:
+            groups = [texts[i:i + fan_in] for i in range(0, len(texts), fan_in)]
+            folded = await asyncio.gather(*(
+                self._generate_overall_summary_async('\n'.join(group), build_prompt)
+                for group in groups
+            ))
+            # A group that failed to fold is carried up as-is
+            texts = [
+                summary or '\n'.join(group)
+                for summary, group in zip(folded, groups)
+            ]
+        return await self._generate_overall_summary_async('\n'.join(texts), build_prompt)
+
+    async def _generate_page_summary_async(
+        self,
+        text: str,
+        page_number: int,
+        build_prompt: Callable[[str], str],
+        max_tokens: int
+    ) -> Optional[str]:
+        """Generate summary for a single page, chunking pages longer than max_tokens"""
+        try:
+            chunks = self._split_text(text, max_tokens)
+            if len(chunks) > 1:
+                # Summarize the chunks concurrently, then fold them like pages
+                chunk_summaries = await asyncio.gather(*(
+                    self._generate_text_cached_async(build_prompt(chunk))
+                    for chunk in chunks
+                ))
+                chunk_summaries = [summary.strip() for summary in chunk_summaries if summary]
+                if not chunk_summaries:
+                    return None
+                if len(chunk_summaries) == 1:
+                    return chunk_summaries[0]
+                return await self._reduce_summaries_async(chunk_summaries, build_prompt)
+
+            prompt = build_prompt(text)
+            response = await self._generate_text_cached_async(prompt)
+            if response:
+                return response.strip()
+            return None
+        except Exception as e:
+            logger.error(f"Error generating summary for page {page_number}: {str(e)}")
+            return None
+
+    async def _generate_overall_summary_async(
+        self,
+        combined_summaries: str,
+        build_prompt: Callable[[str], str]
+    ) -> Optional[str]:
+        """Generate overall summary from page summaries"""
+        try:
+            prompt = build_prompt(combined_summaries)
+            response = await self._generate_text_cached_async(prompt)
+            if response:
+                return response.strip()
+            return None
+        except Exception as e:
+            logger.error(f"Error generating overall summary: {str(e)}")
+            return None
+
+    async def _prewarm_async(self) -> None:
+        """Open client connections ahead of the first real request (no-op by default)"""
+
+    def _start_prewarm(self) -> None:
+        """Schedule _prewarm_async on the shared loop without waiting for it"""
+        future = asyncio.run_coroutine_threadsafe(self._prewarm_async(), _get_event_loop())
+        future.add_done_callback(_log_prewarm_result)
+
+    def close(self) -> None:
+        """Release pooled client resources held by the processor"""
+
+    async def aclose(self) -> None:
+        """Asynchronous counterpart of close()"""
+        self.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    def process_ocr_data_list(
+        self,
+        ocr_data_list: List[Dict[str, Any]],
+        mode: SummaryMode = 'batched'
+    ) -> List[Optional[Dict[str, Any]]]:
+        """Process several OCR documents concurrently (blocking wrapper around process_ocr_data_list_async)"""
+        return run_coroutine_sync(self.process_ocr_data_list_async(ocr_data_list, mode))
+
+    async def process_ocr_data_list_async(
+        self,
+        ocr_data_list: List[Dict[str, Any]],
+        mode: SummaryMode = 'batched'
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Process several OCR documents concurrently
+
+        All documents run as tasks on the shared event loop, so requests go out
+        in parallel over the processor's pooled client; N documents cost roughly
+        one round trip instead of N.
+
+        Args:
+            ocr_data_list: List of dictionaries containing OCR results
+            mode: Summarization strategy passed to process_ocr_data_async
+
+        Returns:
+            List of summary dictionaries (None for failed documents), in input order
+        """
+        if not ocr_data_list:
+            return []
+
+        # Documents admitted at once; requests inside them are further capped
+        # by the provider's max_concurrency semaphore
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def process(ocr_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+            async with semaphore:
+                return await self.process_ocr_data_async(ocr_data, mode)
+
+        return list(await asyncio.gather(*(process(ocr_data) for ocr_data in ocr_data_list)))
+
+    def process_ocr_data_batch(
+        self,
+        ocr_data_list: List[Dict[str, Any]]
+    ) -> List[Optional[Dict[str, Any]]]:
+        """
+        Summarize several OCR documents through the provider's batch API
+
+        Batch jobs trade turnaround time (minutes to hours) for lower cost and
+        higher throughput, so this is meant for offline runs. Each document
+        becomes one batched-JSON prompt. Documents that are too large, that the
+        job fails to answer, or that arrive while use_batch_api is off, go
+        through the interactive path instead.
+
+        Args:
+            ocr_data_list: List of dictionaries containing OCR results
+
+        Returns:
+            List of summary dictionaries (None for failed documents), in input order
+        """
+        if not self._config.get('use_batch_api', False):
+            return self.process_ocr_data_list(ocr_data_list)
+
+        results: List[Optional[Dict[str, Any]]] = [None] * len(ocr_data_list)
+        prompts: Dict[str, str] = {}
+        batched: Dict[int, Tuple[str, AbstractSet[int]]] = {}
+        interactive: List[int] = []
+
+        for index, ocr_data in enumerate(ocr_data_list):
+            document = self._prepare_document(ocr_data)
+            if document is None:
+                continue
+            primary_lang, language_settings, text_pages = document
+            if text_pages and self._fits_single_request(text_pages):
+                prompts[f'doc-{index}'] = self._build_batched_prompt(text_pages, language_settings)
+                batched[index] = primary_lang, {page['page_number'] for page in text_pages}
+            else:
+                interactive.append(index)
+
+        outputs = self._run_batch_job(prompts) if prompts else {}
+        if outputs is None:
+            logger.warning(f"{type(self).__name__} has no batch API; using interactive requests")
+            outputs = {}
+
+        for index, (primary_lang, page_numbers) in batched.items():
+            parsed = self._parse_batched_response(outputs.get(f'doc-{index}') or '', page_numbers)
+            # Incomplete replies are redone interactively, which retries them
+            if parsed is None or len(parsed[0]) != len(page_numbers):
+                interactive.append(index)
+            else:
+                results[index] = self._build_summary_result(*parsed, primary_lang)
+
+        if interactive:
+            interactive.sort()
+            fallback = self.process_ocr_data_list([ocr_data_list[i] for i in interactive])
+            for index, result in zip(interactive, fallback):
+                results[index] = result
+        return results
+
+    def _run_batch_job(self, prompts: Dict[str, str]) -> Optional[Dict[str, str]]:
+        """
+        Submit prompts as one batch job, wait for it and return the outputs
+
+        Args:
+            prompts: Prompt text keyed by record id
+
+        Returns:
+            Generated text keyed by record id (missing ids failed), or None when
+            the provider has no batch API
+        """
+        return None
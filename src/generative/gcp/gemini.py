@@ -1,19 +1,42 @@
+import asyncio
 import google.generativeai as genai
 import logging
 from typing import Dict, Any, Optional
-from config import GEMINI_CONFIG, LOGGING_CONFIG, GCP_CONFIG
+from config import GEMINI_CONFIG, GCP_CONFIG
+from src.generative.base.llm_base import LLMBase, ResponseTruncatedError, language_confidence
 
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['level']),
-    format=LOGGING_CONFIG['format']
-)
 logger = logging.getLogger(__name__)
 
-class GeminiProcessor:
+_MAX_TOKENS = genai.protos.Candidate.FinishReason.MAX_TOKENS
+
+# Request semaphore per event loop, shared by every GeminiProcessor so that
+# max_concurrency caps the whole process; an asyncio.Semaphore only works on
+# the loop it was first used on
+_REQUEST_SEMAPHORES: Dict[asyncio.AbstractEventLoop, asyncio.Semaphore] = {}
+
+def _get_request_semaphore() -> asyncio.Semaphore:
+    """Return the running loop's request semaphore, creating it on first use"""
+    loop = asyncio.get_running_loop()
+    semaphore = _REQUEST_SEMAPHORES.get(loop)
+    if semaphore is None:
+        for stale_loop in [other for other in _REQUEST_SEMAPHORES if other.is_closed()]:
+            del _REQUEST_SEMAPHORES[stale_loop]
+        semaphore = asyncio.Semaphore(GEMINI_CONFIG['max_concurrency'])
+        _REQUEST_SEMAPHORES[loop] = semaphore
+    return semaphore
+
+class GeminiProcessor(LLMBase):
+    __slots__ = ('model',)
+
     def __init__(self):
         """Initialize Gemini model with configurations"""
+        self._config = GEMINI_CONFIG
+        self._init_language_settings(GEMINI_CONFIG['language_settings'], 'en')
         try:
-            genai.configure(api_key=GCP_CONFIG['api_key'])
+            genai.configure(
+                api_key=GCP_CONFIG['api_key'],
+                transport=GEMINI_CONFIG['transport']
+            )
             self.model = genai.GenerativeModel(
                 model_name=GEMINI_CONFIG['model'],
                 generation_config=genai.types.GenerationConfig(
@@ -24,126 +47,53 @@ class GeminiProcessor:
                 )
             )
             logger.info("Successfully initialized Gemini model")
+            if GEMINI_CONFIG['prewarm']:
+                self._start_prewarm()
         except Exception as e:
             logger.error(f"Failed to initialize Gemini model: {str(e)}")
             raise
 
-    def process_ocr_data(self, ocr_data: Dict[str, Any]) -> Optional[Dict[str, Any]]:
-        """
-        Generate summary from OCR data
-
-        Args:
-            ocr_data: Dictionary containing OCR results
+    async def _prewarm_async(self) -> None:
+        """Establish the gRPC channel with a free count_tokens request"""
+        await self.model.count_tokens_async('ping')
 
-        Returns:
-            Dictionary containing summaries and metadata
-        """
+    async def _generate_text_async(
+        self,
+        prompt: str,
+        max_output_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """Send a prompt to Gemini, waiting for a free slot under max_concurrency"""
+        # Per-request settings are merged over the model's generation config
+        generation_config = None
+        if max_output_tokens is not None:
+            generation_config = {'max_output_tokens': max_output_tokens}
         try:
-            # Extract pages from the correct location in JSON structure
-            if not ocr_data.get('responses'):
-                logger.error("OCR data missing 'responses' key")
-                return None
-
-            pages = ocr_data['responses'][0].get('pages', [])
-            if not pages:
-                logger.error("No pages found in OCR data")
-                return None
-
-            # Get primary language from the first page
-            primary_lang = self._get_primary_language_from_pages(pages)
-
-            # Get language settings
-            language_settings = GEMINI_CONFIG['language_settings'].get(
-                primary_lang,
-                GEMINI_CONFIG['language_settings']['en']  # Default to English settings
-            )
-
-            summaries = []
-            # Process each page
-            for page in pages:
-                if page.get('text'):
-                    page_summary = self._generate_page_summary(
-                        page['text'],
-                        page['page_number'],
-                        language_settings
-                    )
-                    if page_summary:
-                        summaries.append({
-                            'page_number': page['page_number'],
-                            'summary': page_summary
-                        })
-
-            # Generate overall summary if there are multiple pages
-            overall_summary = None
-            if len(summaries) > 1:
-                combined_text = '\n'.join([s['summary'] for s in summaries])
-                overall_summary = self._generate_overall_summary(
-                    combined_text,
-                    language_settings
+            async with _get_request_semaphore():
+                response = await self.model.generate_content_async(
+                    prompt,
+                    generation_config=generation_config
                 )
-
-            return {
-                'page_summaries': summaries,
-                'overall_summary': overall_summary,
-                'metadata': {
-                    'total_pages': len(summaries),
-                    'primary_language': primary_lang
-                }
-            }
-
+            truncated = bool(response.candidates) and response.candidates[0].finish_reason == _MAX_TOKENS
+            text = response.text.strip() if response and response.text else None
         except Exception as e:
-            logger.error(f"Error generating summary: {str(e)}")
+            logger.error(f"Error generating content with Gemini: {str(e)}")
             return None
 
-    def _get_primary_language_from_pages(self, pages: list[Dict[str, Any]]) -> str:
+        if truncated:
+            raise ResponseTruncatedError(text or '')
+        return text
+
+    def _detect_primary_language(self, pages: list[Dict[str, Any]]) -> str:
         """Determine primary language from pages"""
         try:
             for page in pages:
                 if page.get('detected_languages'):
-                    # Sort languages by confidence and get the highest confidence language
-                    languages = sorted(
-                        page['detected_languages'],
-                        key=lambda x: x.get('confidence', 0),
-                        reverse=True
-                    )
-                    if languages:
-                        return languages[0]['language_code']
+                    # Single pass for the highest confidence language
+                    top = max(page['detected_languages'], key=language_confidence)
+                    return top['language_code']
 
             logger.warning("No language detected in pages. Defaulting to English.")
             return 'en'
         except Exception as e:
             logger.warning(f"Error detecting language: {str(e)}. Defaulting to English.")
             return 'en'
-
-    def _generate_page_summary(
-        self,
-        text: str,
-        page_number: int,
-        language_settings: Dict[str, Any]
-    ) -> Optional[str]:
-        """Generate summary for a single page"""
-        try:
-            prompt = language_settings['summary'].format(text=text)
-            response = self.model.generate_content(prompt)
-            if response and response.text:
-                return response.text.strip()
-            return None
-        except Exception as e:
-            logger.error(f"Error generating summary for page {page_number}: {str(e)}")
-            return None
-
-    def _generate_overall_summary(
-        self,
-        combined_summaries: str,
-        language_settings: Dict[str, Any]
-    ) -> Optional[str]:
-        """Generate overall summary from page summaries"""
-        try:
-            prompt = language_settings['summary'].format(text=combined_summaries)
-            response = self.model.generate_content(prompt)
-            if response and response.text:
-                return response.text.strip()
-            return None
-        except Exception as e:
-            logger.error(f"Error generating overall summary: {str(e)}")
-            return None
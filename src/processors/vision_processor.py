@@ -1,18 +1,316 @@
 import os
-import json
+import asyncio
+import atexit
+import orjson
 import logging
-from typing import Dict, Any
+import multiprocessing
+import posixpath
+import random
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from operator import itemgetter
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 from datetime import datetime
+from google.api_core.exceptions import DeadlineExceeded, ResourceExhausted, ServiceUnavailable
 from google.cloud import vision
+from google.protobuf import json_format
+from google.protobuf.internal import api_implementation
 from config import (
-    VISION_CONFIG, FILE_CONFIG,
+    VISION_CONFIG, FILE_CONFIG, GCP_CONFIG, SECURITY_CONFIG,
     VISION_CONSTANTS, VISION_OUTPUT_CONFIG
 )
 from src.utils.gcp_utils import GCPClient
-from src.utils.token_counter import TokenCounter
+from src.utils.ocr_cache import OCRCache
+from src.utils.token_counter import ResultCounter
+from src.processors.page_extraction import (
+    extract_simple_page,
+    extract_detailed_page,
+    extract_serialized_page
+)
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    # Without pypdf PDF page counts are unknown, so every document takes the
+    # synchronous path (first max_pages_per_request pages only)
+    PdfReader = None
+
+__all__ = ['VisionProcessor', 'OCRBuffer']
 
 logger = logging.getLogger(__name__)
 
+# Page extraction walks the protobuf tree directly; with the pure-Python
+# backend every field access is interpreted, so make a slow install visible
+if api_implementation.Type() == 'python':
+    logger.warning(
+        "protobuf is using its pure-Python implementation; install protobuf>=4.21 "
+        "(upb backend) for fast Vision response processing"
+    )
+
+# Vision errors worth retrying: quota/rate limits and transient unavailability
+_RETRYABLE_VISION_ERRORS = (ResourceExhausted, ServiceUnavailable, DeadlineExceeded)
+
+# Caps the Vision calls in flight across all processors and threads so that
+# parallel process_document callers stay under the project's quota
+_VISION_SEMAPHORE = threading.BoundedSemaphore(VISION_CONFIG['max_inflight'])
+
+# Extension to MIME type table, read from the config once at import
+_MIME_TABLE = VISION_CONSTANTS['supported_mime_types']
+
+# Allowed extensions as a tuple so str.endswith can test them in one call
+_ALLOWED_EXTENSIONS = tuple(FILE_CONFIG['allowed_extensions'])
+
+# Leading bytes of each supported format; PDFs may have junk before the header
+_MAGIC_SNIFF_BYTES = 1024
+_MAGIC_SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+)
+
+# Output directories already created by this process
+_ENSURED_DIRECTORIES: set = set()
+
+def _ensure_directory(directory: str) -> None:
+    """Create a directory the first time this process writes into it"""
+    if directory not in _ENSURED_DIRECTORIES:
+        os.makedirs(directory, exist_ok=True)
+        _ENSURED_DIRECTORIES.add(directory)
+
+def _publish_file(tmp_path: str, output_path: str) -> str:
+    """
+    Give a finished temporary file its final name without overwriting anything
+
+    os.link fails atomically if the name is taken, so results saved within
+    the same second get a numeric suffix instead of replacing each other.
+    On filesystems without hard links the name is reserved by creating it
+    exclusively and the file is then moved over the reservation. Returns the
+    name the file was published under.
+    """
+    base_path, suffix = os.path.splitext(output_path)
+    counter = 0
+    use_link = True
+    while True:
+        try:
+            if use_link:
+                os.link(tmp_path, output_path)
+            else:
+                open(output_path, 'x').close()
+                os.replace(tmp_path, output_path)
+            return output_path
+        except FileExistsError:
+            counter += 1
+            output_path = f"{base_path}_{counter}{suffix}"
+        except OSError:
+            if not use_link:
+                raise
+            # Hard links unsupported (some FUSE/SMB mounts); retry this name
+            use_link = False
+
+@lru_cache(maxsize=256)
+def _sniff_mime_type(file_path: str, mtime_ns: int) -> Optional[str]:
+    """
+    Identify a supported format from the file's leading bytes
+
+    Keyed on the modification time so a rewritten file is sniffed again.
+    Returns None when the content matches no supported format.
+    """
+    with open(file_path, 'rb') as f:
+        head = f.read(_MAGIC_SNIFF_BYTES)
+    for signature, mime_type in _MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if b'%PDF-' in head:
+        return 'application/pdf'
+    return None
+
+# Async annotation writes output-<first>-to-<last>.json shards per file
+_OUTPUT_SHARD_PATTERN = re.compile(r'output-(\d+)-to-\d+\.json$')
+
+# Worker processes for page extraction, started on first use and shared by all
+# processors. 'spawn' avoids forking a process that holds live gRPC channels.
+_PAGE_POOL: Optional[ProcessPoolExecutor] = None
+
+def _get_page_pool() -> ProcessPoolExecutor:
+    """Return the shared page-extraction process pool, creating it on first use"""
+    global _PAGE_POOL
+    if _PAGE_POOL is None:
+        _PAGE_POOL = ProcessPoolExecutor(
+            max_workers=VISION_OUTPUT_CONFIG['page_workers'],
+            mp_context=multiprocessing.get_context('spawn')
+        )
+    return _PAGE_POOL
+
+# Threads for blocking GCS and file I/O, shared by every processor so the
+# total number of I/O threads stays bounded across batches and event loops
+_IO_POOL: Optional[ThreadPoolExecutor] = None
+
+def _get_io_pool() -> ThreadPoolExecutor:
+    """Return the shared I/O thread pool, creating it on first use"""
+    global _IO_POOL
+    if _IO_POOL is None:
+        _IO_POOL = ThreadPoolExecutor(
+            max_workers=VISION_CONFIG['io_workers'],
+            thread_name_prefix='vision-io'
+        )
+    return _IO_POOL
+
+@atexit.register
+def _shutdown_pools():
+    """Shut down the shared pools; the next use recreates them"""
+    global _PAGE_POOL, _IO_POOL
+    for pool in (_PAGE_POOL, _IO_POOL):
+        if pool is not None:
+            pool.shutdown(wait=True)
+    _PAGE_POOL = None
+    _IO_POOL = None
+
+# Async Vision client and in-flight semaphore per event loop, shared by all
+# processors; an async gRPC channel only works on the loop it was created on.
+# The channel and semaphore hold strong references to their loop, so a weak
+# mapping would never drop them; entries for closed loops are pruned instead.
+_ASYNC_VISION: Dict[asyncio.AbstractEventLoop, Tuple[Any, asyncio.Semaphore]] = {}
+
+def _get_async_vision(credentials) -> Tuple[Any, asyncio.Semaphore]:
+    """Return the running loop's async Vision client and semaphore, creating them on first use"""
+    loop = asyncio.get_running_loop()
+    shared = _ASYNC_VISION.get(loop)
+    if shared is None:
+        # A closed loop's channel can no longer be used or closed cleanly;
+        # dropping the entry releases it together with the loop
+        for stale_loop in [other for other in _ASYNC_VISION if other.is_closed()]:
+            del _ASYNC_VISION[stale_loop]
+        shared = (
+            vision.ImageAnnotatorAsyncClient(credentials=credentials),
+            asyncio.Semaphore(VISION_CONFIG['max_inflight'])
+        )
+        _ASYNC_VISION[loop] = shared
+    return shared
+
+async def _run_io(func, *args):
+    """Run a blocking call on the shared I/O pool from a coroutine"""
+    return await asyncio.get_running_loop().run_in_executor(_get_io_pool(), partial(func, *args))
+
+# Append-only audit log shared by all processors; opened on first write and
+# kept open so each document costs one buffered write instead of open/close
+_AUDIT_FILE = None
+_AUDIT_PENDING = 0
+# Records are written from the I/O pool and batch threads; guards the lazy
+# open, the write and the flush counter
+_AUDIT_LOCK = threading.Lock()
+
+def _write_audit_record(record: Dict[str, Any]) -> None:
+    """Append one JSON line to the audit log, flushing every audit_flush_interval records"""
+    global _AUDIT_FILE, _AUDIT_PENDING
+    line = orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+    with _AUDIT_LOCK:
+        if _AUDIT_FILE is None:
+            _AUDIT_FILE = open(
+                os.path.join(FILE_CONFIG['output_directory'], 'audit_log.jsonl'),
+                'ab',
+                buffering=1 << 16
+            )
+        _AUDIT_FILE.write(line)
+        _AUDIT_PENDING += 1
+        if _AUDIT_PENDING >= SECURITY_CONFIG['audit_flush_interval']:
+            _AUDIT_FILE.flush()
+            _AUDIT_PENDING = 0
+
+@atexit.register
+def _close_audit_log():
+    """Flush and close the audit log; the next write reopens it"""
+    global _AUDIT_FILE, _AUDIT_PENDING
+    with _AUDIT_LOCK:
+        if _AUDIT_FILE is not None:
+            _AUDIT_FILE.close()
+            _AUDIT_FILE = None
+            _AUDIT_PENDING = 0
+
+# Content-addressed cache of Vision responses shared by all processors;
+# opened on first use
+_OCR_CACHE: Optional[OCRCache] = None
+_OCR_CACHE_LOCK = threading.Lock()
+
+def _get_ocr_cache() -> Optional[OCRCache]:
+    """Return the shared OCR cache, or None when caching is disabled"""
+    global _OCR_CACHE
+    if not VISION_CONFIG['cache_enabled']:
+        return None
+    with _OCR_CACHE_LOCK:
+        if _OCR_CACHE is None:
+            cache_path = FILE_CONFIG['vision_cache_path']
+            _ensure_directory(os.path.dirname(cache_path))
+            # Cached OCR text is document data, so it never outlives the
+            # retention period, even with a TTL of 0
+            retention = SECURITY_CONFIG['data_retention_days'] * 24 * 60 * 60
+            ttl = VISION_CONFIG['cache_ttl']
+            if retention:
+                ttl = min(ttl, retention) if ttl else retention
+            _OCR_CACHE = OCRCache(cache_path, ttl)
+    return _OCR_CACHE
+
+@atexit.register
+def _close_ocr_cache():
+    """Close the OCR cache; the next use reopens it"""
+    global _OCR_CACHE
+    if _OCR_CACHE is not None:
+        _OCR_CACHE.close()
+        _OCR_CACHE = None
+
+class OCRBuffer:
+    """
+    Collects documents and sends them to Vision in batches of batch_size
+
+    Obtained from VisionProcessor.buffered_ocr(). Up to batches_in_flight
+    batches run at once, so one batch uploads while an earlier one is being
+    annotated or saved. Once the block exits, output_paths holds each added
+    document's result path ("" on failure) in the order added.
+    """
+
+    def __init__(self, processor: 'VisionProcessor', batch_size: int):
+        self._processor = processor
+        self._batch_size = batch_size
+        self._pending: List[str] = []
+        self._batches: List[Future] = []
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.output_paths: List[str] = []
+
+    def try_add(self, file_path: str) -> None:
+        """Queue a document, flushing the buffer once it holds batch_size files"""
+        self._pending.append(file_path)
+        if len(self._pending) >= self._batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Start annotating the queued documents as one async Vision request"""
+        if not self._pending:
+            return
+        pending, self._pending = self._pending, []
+        # The batches get their own threads: they wait on transfers running in
+        # the shared I/O pool and must not occupy its workers
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self._processor.vision_config['batches_in_flight'],
+                thread_name_prefix='vision-batch'
+            )
+        self._batches.append(self._executor.submit(self._processor._process_document_batch, pending))
+
+    def close(self) -> None:
+        """Flush the queued documents and wait for every batch to finish"""
+        try:
+            self.flush()
+            for batch in self._batches:
+                self.output_paths.extend(batch.result())
+        finally:
+            self._batches = []
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
 class VisionProcessor:
     """Class for processing documents using Google Cloud Vision API"""
 
@@ -28,375 +326,761 @@ class VisionProcessor:
         """
         Processes a document using the Vision API
 
+        Documents with more pages than a synchronous request returns
+        (max_pages_per_request) go through the async batch path instead, so
+        every page is annotated.
+
         Args:
             file_path: Path to the document
 
         Returns:
             str: Path to the saved JSON file containing OCR results
         """
+        file_stat = None
         try:
-            # Check if file exists
-            if not os.path.exists(file_path):
-                raise FileNotFoundError(f"File not found: {file_path}")
-
-            # Check if file size is within limits
-            file_size = os.path.getsize(file_path)
-            if file_size > self.file_config['max_file_size']:
-                raise ValueError(
-                    f"File size exceeds the maximum limit of "
-                    f"{self.file_config['max_file_size']} bytes"
-                )
+            file_stat = self._validate_document(file_path)
 
-            # Upload file to GCS
-            logger.info(f"Uploading {file_path} to GCS...")
-            success, gcs_uri = self.gcp_client.upload_to_storage(file_path)
-            if not success:
-                raise Exception(f"Failed to upload file to GCS: {gcs_uri}")
+            # Reuse the response of an identical earlier document if cached;
+            # checked first so a hit skips the page count as well
+            cache_key, response = self._lookup_cache(file_path, file_stat)
+            if response is not None:
+                logger.info("Using cached OCR result...")
+                output_path = self._save_results(response, file_path)
+                self._save_audit_log(file_path, file_stat.st_size, output_path)
+                return output_path
+
+            if self._exceeds_sync_page_limit(file_path, file_stat):
+                logger.info("Document exceeds the synchronous page limit; using async batch annotation...")
+                return self._process_document_batch([file_path], {0: cache_key})[0]
 
             # Prepare OCR request
             logger.info("Preparing OCR request...")
-            input_config = vision.InputConfig(
-                mime_type=self._get_mime_type(file_path),
-                gcs_source=vision.GcsSource(uri=gcs_uri)
-            )
-
-            features = [
-                vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
-            ]
-
-            # Process all pages
-            pages = [i for i in range(1, VISION_CONSTANTS['max_pages_per_request'] + 1)]
-
-            request = vision.BatchAnnotateFilesRequest(
-                requests=[
-                    vision.AnnotateFileRequest(
-                        input_config=input_config,
-                        features=features,
-                        pages=pages
-                    )
-                ]
-            )
+            request, gcs_uri = self._prepare_request(file_path, file_stat)
 
             # Perform OCR
             logger.info("Performing OCR...")
-            response = self.vision_client.batch_annotate_files(request)
+            response = self._call_vision(self.vision_client.batch_annotate_files, request)
+            self._store_cache(cache_key, response)
 
             # Save results
             logger.info("Saving OCR results...")
             output_path = self._save_results(response, file_path)
+            self._save_audit_log(file_path, file_stat.st_size, output_path)
 
-            # Delete file from GCS if configured
-            if self.output_config.get('delete_after_processing', True):
+            # Delete file from GCS if configured; the result is already saved,
+            # so the delete runs in the background instead of delaying the return
+            if gcs_uri and SECURITY_CONFIG['delete_after_processing']:
                 logger.info(f"Deleting {gcs_uri} from GCS...")
-                self.gcp_client.delete_from_storage(gcs_uri)
+                _get_io_pool().submit(self.gcp_client.delete_from_storage, gcs_uri)
 
             return output_path
 
         except Exception as e:
             logger.error(f"Error processing document with Vision API: {str(e)}")
+            self._save_audit_log(file_path, file_stat.st_size if file_stat else None, "")
             return ""
 
-    def _get_mime_type(self, file_path: str) -> str:
-        """Gets the MIME type of a file based on its extension"""
-        file_ext = os.path.splitext(file_path)[1].lower()
-        return VISION_CONSTANTS['supported_mime_types'].get(
-            file_ext,
-            'application/octet-stream'
-        )
-
-    def _save_results(self, response, input_file: str) -> str:
+    async def process_document_async(self, file_path: str) -> str:
         """
-        Saves OCR results and logs token statistics without modifying the output JSON structure
+        Processes a document using the async Vision client
+
+        GCS transfers and result saving run on the shared I/O pool, so many
+        documents can be in flight on one event loop. All processors on a
+        loop share one async client (one gRPC channel) and one semaphore.
+        Documents over the synchronous page limit are routed to the async
+        batch path, as in process_document.
+
+        Args:
+            file_path: Path to the document
+
+        Returns:
+            str: Path to the saved JSON file containing OCR results
         """
+        file_stat = None
         try:
-            timestamp = datetime.now().strftime(FILE_CONFIG['timestamp_format'])
-            output_filename = FILE_CONFIG['vision_output_filename_pattern'].format(timestamp=timestamp)
-            output_path = os.path.join(FILE_CONFIG['vision_output_directory'], output_filename)
+            file_stat = self._validate_document(file_path)
 
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
+            cache_key, response = await _run_io(self._lookup_cache, file_path, file_stat)
+            if response is not None:
+                logger.info("Using cached OCR result...")
+                output_path = await _run_io(self._save_results, response, file_path)
+                self._save_audit_log(file_path, file_stat.st_size, output_path)
+                return output_path
 
-            # Process and save results
-            result_dict = {
-                'simple': self._process_simple_output,
-                'detailed': self._process_detailed_output,
-            }.get(self.output_config['output_mode'], self._process_simple_output)(response)
+            if await _run_io(self._exceeds_sync_page_limit, file_path, file_stat):
+                logger.info("Document exceeds the synchronous page limit; using async batch annotation...")
+                # The batch waits on transfers it runs in the shared I/O pool,
+                # so it must not occupy one of that pool's workers itself
+                return (await asyncio.to_thread(
+                    self._process_document_batch, [file_path], {0: cache_key}
+                ))[0]
 
-            # Save JSON result
-            with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump(result_dict, f, ensure_ascii=False, indent=2)
+            request, gcs_uri = await _run_io(self._prepare_request, file_path, file_stat)
 
-            # Save raw response if configured
-            if self.output_config.get('save_raw_response', True):
-                raw_output_path = output_path.replace('.json', '_raw.txt')
-                with open(raw_output_path, 'w', encoding='utf-8') as f:
-                    f.write(str(response))
-                logger.info(f"Raw response saved to: {raw_output_path}")
+            logger.info("Performing OCR...")
+            response = await self._call_vision_async(request)
+            await _run_io(self._store_cache, cache_key, response)
 
-            # Log token statistics
-            token_stats = TokenCounter.count_json_file(output_path)
-            logger.info(f"Document processing completed. Total tokens: {token_stats['total_tokens']}, "
-                    f"Pages: {token_stats['structure_stats']['pages']}")
+            logger.info("Saving OCR results...")
+            output_path = await _run_io(self._save_results, response, file_path)
+            self._save_audit_log(file_path, file_stat.st_size, output_path)
+
+            if gcs_uri and SECURITY_CONFIG['delete_after_processing']:
+                logger.info(f"Deleting {gcs_uri} from GCS...")
+                _get_io_pool().submit(self.gcp_client.delete_from_storage, gcs_uri)
 
             return output_path
 
         except Exception as e:
-            logger.error(f"Failed to save OCR results: {str(e)}")
+            logger.error(f"Error processing document with Vision API: {str(e)}")
+            self._save_audit_log(file_path, file_stat.st_size if file_stat else None, "")
             return ""
 
-    def _process_simple_output(self, response) -> Dict[str, Any]:
-        """Process response in simple mode with added type and confidence information"""
-        response_dict = {
-            'responses': []
-        }
+    async def process_documents_async(self, file_paths: List[str]) -> List[str]:
+        """
+        Processes several documents concurrently with process_document_async
 
-        try:
-            for file_response in response.responses:
-                file_data = {
-                    'pages': []
-                }
-
-                for page_response in file_response.responses:
-                    if hasattr(page_response, 'full_text_annotation'):
-                        text_annotation = page_response.full_text_annotation
-
-                        # Extract text blocks for type and confidence information
-                        blocks = []
-                        if text_annotation and text_annotation.pages:
-                            page = text_annotation.pages[0]
-                            for block in page.blocks:
-                                block_text = ''
-                                for paragraph in block.paragraphs:
-                                    for word in paragraph.words:
-                                        word_text = ''
-                                        for symbol in word.symbols:
-                                            word_text += symbol.text
-                                        block_text += word_text + ' '
-
-                                blocks.append({
-                                    'text': block_text.strip(),
-                                    'confidence': block.confidence if self.output_config['include_confidence'] else None,
-                                    'block_type': 'TEXT'  # Default to TEXT type in simple mode
-                                })
-
-                        page_data = {
-                            'page_number': len(file_data['pages']) + 1,
-                            'text': text_annotation.text if text_annotation else '',
-                            'confidence': text_annotation.pages[0].confidence if text_annotation and text_annotation.pages else 0.0,
-                            'blocks': blocks
-                        }
-
-                        # Add language detection if available
-                        if (text_annotation and
-                            text_annotation.pages and
-                            hasattr(text_annotation.pages[0], 'property') and
-                            hasattr(text_annotation.pages[0].property, 'detected_languages')):
-                            page_data['detected_languages'] = [
-                                {
-                                    'language_code': lang.language_code,
-                                    'confidence': lang.confidence
-                                }
-                                for lang in text_annotation.pages[0].property.detected_languages
-                            ]
-
-                        file_data['pages'].append(page_data)
-
-                response_dict['responses'].append(file_data)
+        At most max_inflight Vision calls run at once; uploads and saves of
+        other documents overlap with them.
 
-        except Exception as e:
-            logger.error(f"Error in simple output processing: {str(e)}")
-
-        return response_dict
+        Returns:
+            List[str]: Output path per document ("" on failure), in input order
+        """
+        return list(await asyncio.gather(*(
+            self.process_document_async(file_path) for file_path in file_paths
+        )))
 
-    def _process_detailed_output(self, response) -> Dict[str, Any]:
+    def process_documents(self, file_paths: List[str], batch_size: int = 5) -> List[str]:
         """
-        Process response in detailed mode with enhanced bounding box information
+        Processes several documents, packing each batch into one async Vision call
+
+        Files in a batch are uploaded in parallel and annotated by a single
+        async_batch_annotate_files operation, which writes each file's result
+        to its own GCS prefix. Consecutive batches overlap (see OCRBuffer).
+        All pages are annotated, whatever the synchronous page limit.
 
         Args:
-            response: Vision API response object
+            file_paths: Paths to the documents
+            batch_size: Number of files per Vision request
 
         Returns:
-            Dict containing processed response data
+            List[str]: Path to each document's saved JSON file ("" on failure),
+            in the order of file_paths
         """
-        response_dict = {
-            'responses': [],
-            'total_pages': getattr(response.responses[0], 'total_pages', len(response.responses))
-        }
+        with self.buffered_ocr(batch_size) as buffer:
+            for file_path in file_paths:
+                buffer.try_add(file_path)
+        return buffer.output_paths
 
+    @contextmanager
+    def buffered_ocr(self, batch_size: int = 5) -> Iterator[OCRBuffer]:
+        """
+        Accumulate documents and annotate them batch_size at a time
+
+        Useful when documents arrive one by one (e.g. from a directory walk);
+        whatever is still queued is flushed, and every batch awaited, when
+        the block exits.
+
+            with processor.buffered_ocr() as buffer:
+                for path in paths:
+                    buffer.try_add(path)
+            results = buffer.output_paths
+        """
+        buffer = OCRBuffer(self, batch_size)
         try:
-            for file_response in response.responses:
-                file_data = {
-                    'pages': []
-                }
+            yield buffer
+        finally:
+            buffer.close()
+
+    def _process_document_batch(
+        self,
+        file_paths: List[str],
+        cache_keys: Optional[Dict[int, Optional[str]]] = None
+    ) -> List[str]:
+        """
+        Process one batch of documents with a single async Vision operation
 
-                for page_response in file_response.responses:
-                    if not hasattr(page_response, 'full_text_annotation'):
-                        continue
+        Documents found in the OCR cache are saved without being uploaded.
+        cache_keys holds keys the caller already looked up and missed, by
+        index, so those files are not hashed again.
+        """
+        output_paths = [""] * len(file_paths)
+        process_id = uuid.uuid4().hex
+        bucket_root = f"gs://{GCP_CONFIG['storage_bucket']}/"
+        cache_keys = dict(cache_keys or {})
+        uploaded: Dict[int, str] = {}
+        cached: Dict[int, vision.BatchAnnotateFilesResponse] = {}
+        file_sizes: Dict[int, int] = {}
+        mime_types: Dict[int, str] = {}
+        try:
+            # Validate and upload in parallel; an index prefix keeps same-named
+            # files in one batch apart
+            def upload(index: int) -> Tuple[Optional[str], Optional[vision.BatchAnnotateFilesResponse]]:
+                file_path = file_paths[index]
+                file_stat = self._validate_document(file_path)
+                file_sizes[index] = file_stat.st_size
+                if index not in cache_keys:
+                    cache_keys[index], response = self._lookup_cache(file_path, file_stat)
+                    if response is not None:
+                        return None, response
+                mime_types[index] = self._get_mime_type(file_path, file_stat.st_mtime_ns)
+                destination_blob_name = posixpath.join(
+                    GCP_CONFIG['bucket_prefix'],
+                    process_id,
+                    str(index),
+                    os.path.basename(file_path)
+                )
+                success, gcs_uri = self.gcp_client.upload_to_storage(
+                    file_path,
+                    destination_blob_name,
+                    content_type=mime_types[index]
+                )
+                if not success:
+                    raise Exception(f"Failed to upload file to GCS: {gcs_uri}")
+                return gcs_uri, None
+
+            logger.info(f"Uploading {len(file_paths)} files to GCS...")
+            io_pool = _get_io_pool()
+            futures = {index: io_pool.submit(upload, index) for index in range(len(file_paths))}
+            for index, future in futures.items():
+                try:
+                    gcs_uri, response = future.result()
+                except Exception as e:
+                    logger.error(f"Error preparing {file_paths[index]} for Vision API: {str(e)}")
+                    continue
+                if response is None:
+                    uploaded[index] = gcs_uri
+                else:
+                    cached[index] = response
+
+            for index, response in cached.items():
+                file_path = file_paths[index]
+                logger.info(f"Using cached OCR result for {file_path}...")
+                output_paths[index] = self._save_results(response, file_path)
+                if output_paths[index]:
+                    self._save_audit_log(file_path, file_sizes[index], output_paths[index])
+            if not uploaded:
+                return output_paths
 
-                    text_annotation = page_response.full_text_annotation
-                    if not text_annotation or not text_annotation.pages:
+            features = [
+                vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+            ]
+            output_prefixes = {
+                index: posixpath.join(GCP_CONFIG['bucket_prefix'], process_id, 'output', str(index), '')
+                for index in uploaded
+            }
+            requests = [
+                vision.AsyncAnnotateFileRequest(
+                    input_config=vision.InputConfig(
+                        mime_type=mime_types[index],
+                        gcs_source=vision.GcsSource(uri=gcs_uri)
+                    ),
+                    features=features,
+                    output_config=vision.OutputConfig(
+                        gcs_destination=vision.GcsDestination(uri=bucket_root + output_prefixes[index]),
+                        batch_size=self.vision_config['output_pages_per_shard']
+                    )
+                )
+                for index, gcs_uri in uploaded.items()
+            ]
+
+            logger.info(f"Performing OCR on {len(requests)} files...")
+            operation = self._call_vision(self.vision_client.async_batch_annotate_files, requests=requests)
+            operation.result(timeout=self.vision_config['operation_timeout'])
+
+            logger.info("Saving OCR results...")
+            # Fetch every file's output shards concurrently; each file is saved
+            # as soon as its own download finishes
+            downloads = {
+                index: io_pool.submit(self._load_async_output, prefix)
+                for index, prefix in output_prefixes.items()
+            }
+            for index, download in downloads.items():
+                file_path = file_paths[index]
+                # A file whose output cannot be read or saved fails on its own;
+                # the rest of the batch is still saved
+                try:
+                    response = download.result()
+                    if response is None:
+                        logger.error(f"No Vision output found for {file_path}")
                         continue
+                    self._store_cache(cache_keys.get(index), response)
+                    output_paths[index] = self._save_results(response, file_path)
+                    # Failed saves are audited with the other failures below
+                    if output_paths[index]:
+                        self._save_audit_log(file_path, file_sizes[index], output_paths[index])
+                except Exception as e:
+                    logger.error(f"Error saving Vision output for {file_path}: {str(e)}")
 
-                    page = text_annotation.pages[0]
-                    page_data = {
-                        'page_number': len(file_data['pages']) + 1,
-                        'text': text_annotation.text,
-                        'width': page.width,
-                        'height': page.height,
-                        'confidence': page.confidence,
-                        'blocks': []
-                    }
-
-                    # Add language detection
-                    if (hasattr(page, 'property') and
-                        hasattr(page.property, 'detected_languages')):
-                        page_data['detected_languages'] = [
-                            {
-                                'language_code': lang.language_code,
-                                'confidence': lang.confidence
-                            }
-                            for lang in page.property.detected_languages
-                        ]
-
-                    # Process blocks with enhanced bounding box information
-                    for block in page.blocks:
-                        if (block.confidence <
-                            self.output_config['min_confidence_threshold']):
-                            continue
-
-                        block_data = self._process_block(block)
-                        page_data['blocks'].append(block_data)
-
-                    file_data['pages'].append(page_data)
-
-                response_dict['responses'].append(file_data)
+        except Exception as e:
+            logger.error(f"Error processing documents with Vision API: {str(e)}")
+
+        finally:
+            # Documents that failed at any stage are audited here, so the log
+            # covers every document in the batch
+            for index, output_path in enumerate(output_paths):
+                if not output_path:
+                    self._save_audit_log(file_paths[index], file_sizes.get(index), "")
+
+            # Everything this batch wrote lives under its own process id, so
+            # the listing cannot pick up another job's inputs or outputs
+            if SECURITY_CONFIG['delete_after_processing'] and uploaded:
+                _get_io_pool().submit(
+                    self._delete_batch_blobs,
+                    posixpath.join(GCP_CONFIG['bucket_prefix'], process_id, '')
+                )
+
+        return output_paths
+
+    def _delete_batch_blobs(self, prefix: str) -> None:
+        """Delete every blob a batch left under its GCS prefix"""
+        _, blob_names = self.gcp_client.list_files_in_bucket(prefix)
+        logger.info(f"Deleting {len(blob_names)} blobs from GCS...")
+        self.gcp_client.delete_blobs(blob_names)
+
+    def _load_async_output(self, prefix: str) -> Optional[vision.BatchAnnotateFilesResponse]:
+        """
+        Read one file's async annotation output shards back into a response
+
+        The shards are parsed straight into protobuf and merged in page order,
+        so the same extraction path as the synchronous response applies.
+        """
+        success, blobs = self.gcp_client.download_blobs(prefix)
+        shards = []
+        for blob_name, data in blobs:
+            match = _OUTPUT_SHARD_PATTERN.search(blob_name)
+            if match:
+                shards.append((int(match.group(1)), data))
+        if not success or not shards:
+            return None
+
+        file_response = vision.AnnotateFileResponse.pb()()
+        for _, data in sorted(shards, key=itemgetter(0)):
+            file_response.MergeFrom(json_format.Parse(
+                data,
+                vision.AnnotateFileResponse.pb()(),
+                ignore_unknown_fields=True
+            ))
+        if not file_response.total_pages:
+            file_response.total_pages = len(file_response.responses)
+        return vision.BatchAnnotateFilesResponse(
+            responses=[vision.AnnotateFileResponse.wrap(file_response)]
+        )
+
+    def _upload_document(self, file_path: str, mime_type: str) -> str:
+        """Upload a document under a fresh process id and return its gs:// URI"""
+        # A per-call prefix keeps concurrent runs on same-named files from
+        # overwriting or deleting each other's input
+        destination_blob_name = posixpath.join(
+            GCP_CONFIG['bucket_prefix'],
+            uuid.uuid4().hex,
+            os.path.basename(file_path)
+        )
+        success, gcs_uri = self.gcp_client.upload_to_storage(
+            file_path,
+            destination_blob_name,
+            content_type=mime_type
+        )
+        if not success:
+            raise Exception(f"Failed to upload file to GCS: {gcs_uri}")
+        return gcs_uri
 
+    def _exceeds_sync_page_limit(self, file_path: str, file_stat: os.stat_result) -> bool:
+        """
+        Check whether a document has more pages than a synchronous request returns
+
+        Such documents are annotated by the async batch path instead. Counting
+        parses the PDF with pypdf, so callers check the OCR cache first.
+        Images count as one page; when pypdf is missing or cannot read the
+        file the count is unknown and the document stays synchronous, which
+        annotates only its first max_pages_per_request pages.
+        """
+        mime_type = self._get_mime_type(file_path, file_stat.st_mtime_ns)
+        if mime_type != 'application/pdf' or PdfReader is None:
+            return False
+        try:
+            page_count = len(PdfReader(file_path).pages)
         except Exception as e:
-            logger.error(f"Error in detailed output processing: {str(e)}")
-            raise
+            logger.warning(f"Could not count the pages of {file_path}: {str(e)}")
+            return False
+        return page_count > VISION_CONSTANTS['max_pages_per_request']
+
+    def _lookup_cache(
+        self,
+        file_path: str,
+        file_stat: os.stat_result
+    ) -> Tuple[Optional[str], Optional[vision.BatchAnnotateFilesResponse]]:
+        """
+        Look up a cached Vision response for the document's content
 
-        return response_dict
+        The key covers the file bytes plus the request options that change the
+        response; output settings are applied when the response is saved, so
+        they are not part of it.
 
-    def _process_block(self, block) -> Dict[str, Any]:
+        Returns:
+            Tuple of (cache key or None when caching is off, cached response or None)
         """
-        Process a single block with enhanced bounding box information
+        cache = _get_ocr_cache()
+        if cache is None:
+            return None, None
+        try:
+            mime_type = self._get_mime_type(file_path, file_stat.st_mtime_ns)
+            # Only complete responses are stored, whichever path produced them
+            fingerprint = f"{mime_type}:DOCUMENT_TEXT_DETECTION"
+            cache_key = cache.make_key(file_path, fingerprint)
+            cached = cache.get(cache_key)
+        except Exception as e:
+            logger.error(f"Error reading OCR cache: {str(e)}")
+            return None, None
+        if cached is None:
+            return cache_key, None
+        return cache_key, vision.BatchAnnotateFilesResponse.deserialize(cached)
+
+    def _store_cache(self, cache_key: Optional[str], response) -> None:
+        """Cache a Vision response under the key from _lookup_cache"""
+        if cache_key is None:
+            return
+        # Failed pages would otherwise be replayed until the entry expires, and
+        # a synchronous response cut off at max_pages_per_request is partial
+        response_pb = type(response).pb(response)
+        if any(
+            file_response.HasField('error')
+            or file_response.total_pages > len(file_response.responses)
+            or any(page.HasField('error') for page in file_response.responses)
+            for file_response in response_pb.responses
+        ):
+            return
+        try:
+            _get_ocr_cache().put(cache_key, response_pb.SerializeToString())
+        except Exception as e:
+            logger.error(f"Error writing OCR cache: {str(e)}")
 
-        Args:
-            block: Vision API block object
+    def _prepare_request(
+        self,
+        file_path: str,
+        file_stat: os.stat_result
+    ) -> Tuple[vision.BatchAnnotateFilesRequest, Optional[str]]:
+        """
+        Build the annotation request, staging the document in GCS only when needed
+
+        Files up to inline_max_bytes are embedded in the request, which saves
+        the upload and delete round trips. Documents reaching this point fit
+        the synchronous page limit, or have an unknown page count.
 
         Returns:
-            Dict containing processed block data
-        """
-        block_types = {
-            0: 'UNKNOWN',  # Unknown block type
-            1: 'TEXT',     # Regular text block
-            2: 'TABLE',    # Table block
-            3: 'PICTURE',  # Image block
-            4: 'RULER',    # Horizontal/vertical line box
-            5: 'BARCODE',  # Barcode block
-        }
-        block_data = {
-            'text': '',
-            'confidence': block.confidence if self.output_config['include_confidence'] else None,
-            'block_type': block_types.get(int(str(block.block_type)), 'UNKNOWN'),
-        }
-
-        # Add normalized bounding box coordinates
-        if self.output_config['include_bounding_boxes'] and hasattr(block, 'bounding_box'):
-            block_data['bounding_box'] = {
-                'normalized_vertices': [
-                    {
-                        'x': vertex.x,
-                        'y': vertex.y
-                    }
-                    for vertex in block.bounding_box.normalized_vertices
-                ]
-            }
+            Tuple of (request, gs:// URI of the staged upload or None)
+        """
+        # Resolved once and shared by the upload and the request
+        mime_type = self._get_mime_type(file_path, file_stat.st_mtime_ns)
+        if file_stat.st_size <= self.vision_config['inline_max_bytes']:
+            with open(file_path, 'rb') as f:
+                return self._build_file_request(mime_type, content=f.read()), None
+
+        logger.info(f"Uploading {file_path} to GCS...")
+        gcs_uri = self._upload_document(file_path, mime_type)
+        return self._build_file_request(mime_type, gcs_uri=gcs_uri), gcs_uri
+
+    def _build_file_request(
+        self,
+        mime_type: str,
+        gcs_uri: Optional[str] = None,
+        content: Optional[bytes] = None
+    ) -> vision.BatchAnnotateFilesRequest:
+        """Build the synchronous annotation request for the first pages of a document"""
+        if content is not None:
+            input_config = vision.InputConfig(
+                mime_type=mime_type,
+                content=content
+            )
+        else:
+            input_config = vision.InputConfig(
+                mime_type=mime_type,
+                gcs_source=vision.GcsSource(uri=gcs_uri)
+            )
 
-        # Process paragraphs
-        if hasattr(block, 'paragraphs'):
-            block_data['paragraphs'] = []
-            for paragraph in block.paragraphs:
-                para_data = self._process_paragraph(paragraph)
-                block_data['paragraphs'].append(para_data)
+        features = [
+            vision.Feature(type_=vision.Feature.Type.DOCUMENT_TEXT_DETECTION)
+        ]
 
-                # Append paragraph text to block text
-                block_data['text'] += para_data['text'] + '\n'
+        # Process all pages
+        pages = [i for i in range(1, VISION_CONSTANTS['max_pages_per_request'] + 1)]
 
-        block_data['text'] = block_data['text'].strip()
-        return block_data
+        return vision.BatchAnnotateFilesRequest(
+            requests=[
+                vision.AnnotateFileRequest(
+                    input_config=input_config,
+                    features=features,
+                    pages=pages
+                )
+            ]
+        )
 
-    def _process_paragraph(self, paragraph) -> Dict[str, Any]:
+    def _validate_document(self, file_path: str) -> os.stat_result:
         """
-        Process a single paragraph with detailed information
-
-        Args:
-            paragraph: Vision API paragraph object
+        Check that a document exists, has a supported type and fits the size limit
 
         Returns:
-            Dict containing processed paragraph data
-        """
-        para_data = {
-            'text': '',
-            'confidence': paragraph.confidence if self.output_config['include_confidence'] else None,
-        }
-
-        # Add normalized bounding box coordinates for paragraph
-        if self.output_config['include_bounding_boxes'] and hasattr(paragraph, 'bounding_box'):
-            para_data['bounding_box'] = {
-                'normalized_vertices': [
-                    {
-                        'x': vertex.x,
-                        'y': vertex.y
-                    }
-                    for vertex in paragraph.bounding_box.normalized_vertices
-                ]
-            }
+            os.stat_result: The file's stat, reused for its size and MIME cache key
+        """
+        # One stat call both checks existence and gives the size
+        try:
+            file_stat = os.stat(file_path)
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {file_path}") from None
+
+        # Check if file type is supported
+        if not file_path.lower().endswith(_ALLOWED_EXTENSIONS):
+            raise ValueError(f"Unsupported file type: {os.path.splitext(file_path)[1].lower()}")
+
+        # Check if file size is within limits
+        if file_stat.st_size > self.file_config['max_file_size']:
+            raise ValueError(
+                f"File size exceeds the maximum limit of "
+                f"{self.file_config['max_file_size']} bytes"
+            )
 
-        # Process words
-        if hasattr(paragraph, 'words'):
-            para_data['words'] = []
-            for word in paragraph.words:
-                word_data = self._process_word(word)
-                para_data['words'].append(word_data)
-                para_data['text'] += word_data['text'] + ' '
+        return file_stat
 
-        para_data['text'] = para_data['text'].strip()
-        return para_data
+    def _call_vision(self, method, *args, **kwargs):
+        """
+        Call a Vision client method, retrying throttled and transient failures
 
-    def _process_word(self, word) -> Dict[str, Any]:
+        Retries use full-jitter exponential backoff starting at one second and
+        capped at max_retry_delay; other errors propagate immediately.
         """
-        Process a single word with detailed information
+        max_retries = self.vision_config['max_retries']
+        for attempt in range(max_retries + 1):
+            try:
+                with _VISION_SEMAPHORE:
+                    return method(*args, **kwargs)
+            except _RETRYABLE_VISION_ERRORS as e:
+                if attempt == max_retries:
+                    raise
+                time.sleep(self._retry_delay(e, attempt))
+
+    async def _call_vision_async(self, request: vision.BatchAnnotateFilesRequest):
+        """Async counterpart of _call_vision for batch_annotate_files"""
+        client, semaphore = _get_async_vision(self.gcp_client.credentials)
+        max_retries = self.vision_config['max_retries']
+        for attempt in range(max_retries + 1):
+            try:
+                async with semaphore:
+                    return await client.batch_annotate_files(request)
+            except _RETRYABLE_VISION_ERRORS as e:
+                if attempt == max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(e, attempt))
+
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Return the full-jitter backoff before retry number attempt + 1 and log it"""
+        delay = random.uniform(0, min(self.vision_config['max_retry_delay'], 2 ** attempt))
+        logger.warning(
+            f"Vision API call failed ({type(error).__name__}), "
+            f"retrying in {delay:.1f}s ({attempt + 1}/{self.vision_config['max_retries']})"
+        )
+        return delay
 
-        Args:
-            word: Vision API word object
+    def _save_audit_log(self, file_path: str, file_size: Optional[int], output_path: str) -> None:
+        """
+        Record which document was processed and where its results went
+
+        Failed documents are recorded with an empty output_file; file_size is
+        None when the document could not be read.
+        """
+        if not SECURITY_CONFIG['enable_audit_logs']:
+            return
+        try:
+            _write_audit_record({
+                'timestamp': datetime.now().isoformat(),
+                'input_file': os.path.basename(file_path),
+                'file_size': file_size,
+                'output_file': output_path,
+                'output_mode': self.output_config['output_mode'],
+                'status': 'success' if output_path else 'failed'
+            })
+        except OSError as e:
+            logger.warning(f"Failed to write audit log: {str(e)}")
+
+    @staticmethod
+    def _get_mime_type(file_path: str, mtime_ns: Optional[int] = None) -> str:
+        """
+        Gets the MIME type of a file from its content, falling back to its extension
+
+        Sniffing catches mislabelled files (a PNG saved as .jpg) before they
+        are uploaded and rejected by Vision. Pass mtime_ns from an existing
+        stat to skip statting the file again.
+        """
+        try:
+            if mtime_ns is None:
+                mtime_ns = os.stat(file_path).st_mtime_ns
+            mime_type = _sniff_mime_type(file_path, mtime_ns)
+        except OSError:
+            mime_type = None
+        if mime_type is not None:
+            return mime_type
+        return _MIME_TABLE.get(os.path.splitext(file_path)[1].lower(), 'application/octet-stream')
+
+    def _save_results(self, response, input_file: str) -> str:
+        """
+        Saves OCR results and logs token statistics without modifying the output JSON structure
+        """
+        try:
+            timestamp = time.strftime(FILE_CONFIG['timestamp_format'])
+            output_filename = FILE_CONFIG['vision_output_filename_pattern'].format(timestamp=timestamp)
+            output_path = os.path.join(FILE_CONFIG['vision_output_directory'], output_filename)
+
+            _ensure_directory(os.path.dirname(output_path))
+
+            # Pick the page extractor for the output mode; detailed output also
+            # records the page count
+            if self.output_config['output_mode'] == 'detailed':
+                extract = self._detailed_extractor()
+                total_pages = getattr(response.responses[0], 'total_pages', len(response.responses))
+            else:
+                extract = self._simple_extractor()
+                total_pages = None
+
+            # Save JSON result (UTF-8, 2-space indent, same bytes as json.dump)
+            # page by page into a temporary file, then publish it under its
+            # final name so readers never see a partial result
+            tmp_path = f"{output_path}.{uuid.uuid4().hex}.tmp"
+            try:
+                counter = ResultCounter()
+                with open(tmp_path, 'wb') as f:
+                    self._write_results(f, response, extract, total_pages, counter)
+                output_path = _publish_file(tmp_path, output_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+
+            # Save raw response if configured
+            if self.output_config.get('save_raw_response', True):
+                raw_output_path = self._save_raw_response(response, output_path)
+                logger.info(f"Raw response saved to: {raw_output_path}")
+
+            # Log token statistics, counted while the pages were written
+            token_stats = counter.as_dict()
+            logger.info(f"Document processing completed. Total tokens: {token_stats['total_tokens']}, "
+                    f"Pages: {token_stats['structure_stats']['pages']}")
+
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Failed to save OCR results: {str(e)}")
+            return ""
+
+    def _save_raw_response(self, response, output_path: str) -> str:
+        """
+        Write the unprocessed Vision response next to the JSON result
+
+        'pb' writes the wire bytes straight from the underlying message, with no
+        Python-level conversion; 'json' and 'text' exist for manual inspection.
 
         Returns:
-            Dict containing processed word data
-        """
-        word_data = {
-            'text': '',
-            'confidence': word.confidence if self.output_config['include_confidence'] else None,
-        }
-
-        # Add normalized bounding box coordinates for word
-        if self.output_config['include_bounding_boxes'] and hasattr(word, 'bounding_box'):
-            word_data['bounding_box'] = {
-                'normalized_vertices': [
-                    {
-                        'x': vertex.x,
-                        'y': vertex.y
-                    }
-                    for vertex in word.bounding_box.normalized_vertices
-                ]
-            }
+            str: Path of the raw response file
+        """
+        raw_format = self.output_config['raw_response_format']
+        response_pb = type(response).pb(response)
+        base_path = os.path.splitext(output_path)[0]
+        if raw_format == 'json':
+            raw_output_path = f"{base_path}_raw.json"
+            data = json_format.MessageToJson(response_pb, preserving_proto_field_name=True, indent=None)
+            with open(raw_output_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+        elif raw_format == 'text':
+            raw_output_path = f"{base_path}_raw.txt"
+            with open(raw_output_path, 'w', encoding='utf-8') as f:
+                f.write(str(response))
+        else:
+            raw_output_path = f"{base_path}_raw.pb"
+            with open(raw_output_path, 'wb') as f:
+                f.write(response_pb.SerializeToString())
+        return raw_output_path
+
+    def _write_results(
+        self,
+        f,
+        response,
+        extract,
+        total_pages: Optional[int],
+        counter: Optional[ResultCounter] = None
+    ) -> None:
+        """
+        Stream the processed response to f one page at a time
+
+        Produces the same bytes as orjson.dumps(result_dict, option=OPT_INDENT_2)
+        on the whole result dict ({'responses': [{'pages': [...]}, ...]}, plus
+        'total_pages' in detailed mode), but only one page's dict is alive at
+        a time. If a counter is given, it
+        collects the file's token statistics along the way.
+        """
+        f.write(b'{\n  "responses": [')
+        for file_index, file_response in enumerate(response.responses):
+            f.write(b',\n    {\n      "pages": [' if file_index else b'\n    {\n      "pages": [')
+            if counter is not None:
+                counter.add_response()
+            wrote_page = False
+            for page_data in self._iter_pages(file_response, extract):
+                if counter is not None:
+                    counter.add_page(page_data)
+                # orjson never emits raw newlines inside strings, so indenting
+                # every line break re-nests the page under "pages"
+                f.write(b',\n        ' if wrote_page else b'\n        ')
+                f.write(orjson.dumps(page_data, option=orjson.OPT_INDENT_2).replace(b'\n', b'\n        '))
+                wrote_page = True
+            f.write(b'\n      ]\n    }' if wrote_page else b']\n    }')
+        f.write(b'\n  ]' if response.responses else b']')
+        if total_pages is not None:
+            f.write(b',\n  "total_pages": ' + orjson.dumps(total_pages))
+            if counter is not None:
+                counter.add_total_pages()
+        f.write(b'\n}')
+
+    def _simple_extractor(self):
+        """Return the page extractor for simple mode"""
+        return partial(
+            extract_simple_page,
+            include_confidence=self.output_config['include_confidence']
+        )
 
-        # Process symbols
-        if hasattr(word, 'symbols'):
-            word_text = ''
-            for symbol in word.symbols:
-                symbol_text = symbol.text
-                word_text += symbol_text
+    def _detailed_extractor(self):
+        """Return the page extractor for detailed mode"""
+        output_config = self.output_config
+        return partial(
+            extract_detailed_page,
+            min_confidence=output_config['min_confidence_threshold'],
+            include_confidence=output_config['include_confidence'],
+            include_bounding_boxes=output_config['include_bounding_boxes']
+        )
 
-            word_data['text'] = word_text
+    def _iter_pages(self, file_response, extract) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the extracted pages of a file response, numbered from 1
 
-        return word_data
+        Large documents are spread across the shared worker-process pool; the
+        traversal is CPU-bound Python, so threads would serialize on the GIL.
+        """
+        # Walk the raw protobuf messages; the proto-plus wrappers are far slower
+        page_responses = vision.AnnotateFileResponse.pb(file_response).responses
+        output_config = self.output_config
+        page_workers = output_config['page_workers']
+        if (output_config['parallel_pages'] and
+                page_workers > 1 and
+                len(page_responses) >= output_config['parallel_page_threshold']):
+            pool = _get_page_pool()
+            chunksize = max(1, len(page_responses) // (page_workers * 4))
+            extracted = pool.map(
+                partial(extract_serialized_page, extract=extract),
+                [page_response.SerializeToString() for page_response in page_responses],
+                chunksize=chunksize
+            )
+        else:
+            extracted = map(extract, page_responses)
+
+        page_number = 0
+        for page_data in extracted:
+            if page_data is None:
+                continue
+            page_number += 1
+            page_data['page_number'] = page_number
+            yield page_data
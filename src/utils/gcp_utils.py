@@ -1,38 +1,55 @@
 import os
 import logging
-from typing import Optional, Tuple
+from functools import lru_cache
+from typing import List, Optional, Tuple
+from google.api_core.exceptions import NotFound
 from google.cloud import storage
 from google.cloud import vision
 from google.oauth2 import service_account
-from config import GCP_CONFIG, LOGGING_CONFIG, VISION_CONSTANTS
+from config import GCP_CONFIG, VISION_CONSTANTS
 
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['level']),
-    format=LOGGING_CONFIG['format'],
-    filename=LOGGING_CONFIG['file_path']
-)
 logger = logging.getLogger(__name__)
 
+# Extension to MIME type table (read-only), used when callers pass no content type
+_MIME_TABLE = VISION_CONSTANTS['supported_mime_types']
+
+# Operations per GCS batch request (the JSON API allows at most 100)
+_DELETE_BATCH_SIZE = 100
+
+@lru_cache(maxsize=1)
+def _get_shared_clients() -> Tuple[service_account.Credentials, storage.Client, vision.ImageAnnotatorClient]:
+    """
+    Return the process-wide credentials, Storage client and Vision client
+
+    Built once so every GCPClient shares one set of connections; the gRPC
+    channel is thread-safe and multiplexes concurrent calls.
+    """
+    credentials = GCPClient._get_credentials()
+    storage_client = storage.Client(
+        credentials=credentials,
+        project=GCP_CONFIG['project_id']
+    )
+    vision_client = vision.ImageAnnotatorClient(
+        credentials=credentials
+    )
+    return credentials, storage_client, vision_client
+
 class GCPClient:
     """GCP client wrapper for authentication and common operations"""
 
     def __init__(self):
         """Initialize GCP client with credentials"""
         try:
-            self.credentials = self._get_credentials()
-            self.storage_client = storage.Client(
-                credentials=self.credentials,
-                project=GCP_CONFIG['project_id']
-            )
-            self.vision_client = vision.ImageAnnotatorClient(
-                credentials=self.credentials
-            )
+            self.credentials, self.storage_client, self.vision_client = _get_shared_clients()
+            # Handle for the configured bucket, resolved once for every operation
+            self._bucket = self.storage_client.bucket(GCP_CONFIG['storage_bucket'])
             logger.info("Successfully initialized GCP client")
         except Exception as e:
             logger.error(f"Failed to initialize GCP client: {str(e)}")
             raise
 
-    def _get_credentials(self) -> service_account.Credentials:
+    @staticmethod
+    def _get_credentials() -> service_account.Credentials:
         """Get GCP credentials from service account file"""
         try:
             credentials_path = GCP_CONFIG['credentials_path']
@@ -52,7 +69,8 @@ class GCPClient:
     def upload_to_storage(
         self,
         local_file_path: str,
-        destination_blob_name: Optional[str] = None
+        destination_blob_name: Optional[str] = None,
+        content_type: Optional[str] = None
     ) -> Tuple[bool, str]:
         """
         Upload a file to Google Cloud Storage
@@ -60,13 +78,13 @@ class GCPClient:
         Args:
             local_file_path: Path to the local file
             destination_blob_name: Name to give the file in GCS (optional)
+            content_type: MIME type, if the caller already resolved it (optional)
 
         Returns:
             Tuple of (success status, public URL or error message)
         """
         try:
-            # Get bucket
-            bucket = self.storage_client.bucket(GCP_CONFIG['storage_bucket'])
+            bucket = self._bucket
 
             # Generate destination blob name if not provided
             if not destination_blob_name:
@@ -76,20 +94,20 @@ class GCPClient:
                     file_name
                 )
 
-            # Create blob and upload file
-            blob = bucket.blob(destination_blob_name)
+            # Create blob and upload file; files over the chunk size stream
+            # from disk chunk by chunk instead of being buffered whole
+            blob = bucket.blob(destination_blob_name, chunk_size=GCP_CONFIG['upload_chunk_size'])
 
             # Get file extension and mime type
-            file_ext = os.path.splitext(local_file_path)[1].lower()
-            content_type = VISION_CONSTANTS['supported_mime_types'].get(
-                file_ext,
-                'application/octet-stream'
-            )
+            if content_type is None:
+                file_ext = os.path.splitext(local_file_path)[1].lower()
+                content_type = _MIME_TABLE.get(file_ext, 'application/octet-stream')
 
             # Upload with content type
             blob.upload_from_filename(
                 local_file_path,
-                content_type=content_type
+                content_type=content_type,
+                timeout=GCP_CONFIG['upload_timeout']
             )
 
             logger.info(
@@ -137,6 +155,40 @@ class GCPClient:
             logger.error(f"Failed to delete blob {gcs_uri}: {str(e)}")
             return False
 
+    def delete_blobs(self, blob_names: List[str]) -> bool:
+        """
+        Delete several blobs from the configured GCS bucket in batched requests
+
+        Deletes are grouped into batch requests of up to _DELETE_BATCH_SIZE
+        operations, so cleanup costs one round trip per group rather than
+        one per blob. A failing group is logged and the remaining groups are
+        still deleted; blobs that are already gone count as deleted.
+
+        Args:
+            blob_names: Names of the blobs to delete
+
+        Returns:
+            bool: Success status
+        """
+        bucket = self._bucket
+        success = True
+        for start in range(0, len(blob_names), _DELETE_BATCH_SIZE):
+            try:
+                # Every operation in the group is sent before the first error
+                # is raised, so a missing blob does not stop the others
+                with self.storage_client.batch():
+                    for blob_name in blob_names[start:start + _DELETE_BATCH_SIZE]:
+                        bucket.delete_blob(blob_name)
+            except NotFound as e:
+                logger.warning(f"Some blobs were already deleted: {str(e)}")
+            except Exception as e:
+                logger.error(f"Failed to delete blobs: {str(e)}")
+                success = False
+
+        if success:
+            logger.info(f"Successfully deleted {len(blob_names)} blobs")
+        return success
+
     def list_files_in_bucket(
         self,
         prefix: Optional[str] = None
@@ -151,10 +203,11 @@ class GCPClient:
             Tuple of (success status, list of file names)
         """
         try:
-            bucket = self.storage_client.bucket(GCP_CONFIG['storage_bucket'])
+            bucket = self._bucket
             prefix = prefix or GCP_CONFIG['bucket_prefix']
 
-            blobs = bucket.list_blobs(prefix=prefix)
+            # Only names are needed, so ask GCS for nothing else per object
+            blobs = bucket.list_blobs(prefix=prefix, fields='items(name),nextPageToken')
             file_list = [blob.name for blob in blobs]
 
             return True, file_list
@@ -163,6 +216,28 @@ class GCPClient:
             logger.error(f"Failed to list files: {str(e)}")
             return False, []
 
+    def download_blobs(self, prefix: str) -> Tuple[bool, List[Tuple[str, bytes]]]:
+        """
+        Download every blob under a prefix in the configured GCS bucket
+
+        Args:
+            prefix: Blob name prefix to download
+
+        Returns:
+            Tuple of (success status, list of (blob name, contents))
+        """
+        try:
+            bucket = self._bucket
+            blobs = [
+                (blob.name, blob.download_as_bytes())
+                for blob in bucket.list_blobs(prefix=prefix)
+            ]
+            return True, blobs
+
+        except Exception as e:
+            logger.error(f"Failed to download blobs under {prefix}: {str(e)}")
+            return False, []
+
     def get_signed_url(
         self,
         blob_name: str,
@@ -179,7 +254,7 @@ class GCPClient:
             Tuple of (success status, signed URL or error message)
         """
         try:
-            bucket = self.storage_client.bucket(GCP_CONFIG['storage_bucket'])
+            bucket = self._bucket
             blob = bucket.blob(blob_name)
 
             url = blob.generate_signed_url(
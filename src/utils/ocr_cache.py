@@ -0,0 +1,97 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import partial
+from typing import Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bytes read per chunk when hashing a document
+_HASH_CHUNK_SIZE = 1 << 20
+
+class OCRCache:
+    """SQLite store of serialized Vision responses keyed by document content"""
+
+    # Writes between sweeps of expired rows
+    purge_interval: int = 100
+
+    def __init__(self, db_path: str, ttl_seconds: int):
+        """
+        Open (or create) the cache database
+
+        Args:
+            db_path: Path to the SQLite file
+            ttl_seconds: Entries older than this are ignored and purged; 0 keeps them forever
+        """
+        self.ttl_seconds = ttl_seconds
+        self._puts_since_purge = 0
+        # One connection shared by all threads, serialized by the lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute(
+            'CREATE TABLE IF NOT EXISTS ocr_cache '
+            '(key TEXT PRIMARY KEY, response BLOB NOT NULL, created_at INTEGER NOT NULL)'
+        )
+        # Entries for documents that are never resubmitted are only removed here
+        with self._lock:
+            self._purge_expired()
+
+    @staticmethod
+    def make_key(file_path: str, fingerprint: str) -> str:
+        """
+        Build a cache key from the SHA-256 of a file's bytes and a request fingerprint
+
+        Args:
+            file_path: Path to the document
+            fingerprint: Request options that change the Vision output
+        """
+        # Read in fixed-size chunks so large documents are never held whole
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(partial(f.read, _HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        return f"{digest.hexdigest()}:{fingerprint}"
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the cached response bytes for key, or None on a miss or expired entry"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT response, created_at FROM ocr_cache WHERE key = ?', (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if self.ttl_seconds and time.time() - row[1] > self.ttl_seconds:
+                self._conn.execute('DELETE FROM ocr_cache WHERE key = ?', (key,))
+                return None
+        return row[0]
+
+    def put(self, key: str, response: bytes) -> None:
+        """Store response bytes under key, replacing any previous entry"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO ocr_cache (key, response, created_at) VALUES (?, ?, ?)',
+                (key, response, int(time.time()))
+            )
+            self._puts_since_purge += 1
+            if self._puts_since_purge >= self.purge_interval:
+                self._purge_expired()
+
+    def _purge_expired(self) -> None:
+        """Delete every entry older than the TTL; the caller holds the lock"""
+        self._puts_since_purge = 0
+        if not self.ttl_seconds:
+            return
+        deleted = self._conn.execute(
+            'DELETE FROM ocr_cache WHERE created_at < ?',
+            (int(time.time()) - self.ttl_seconds,)
+        ).rowcount
+        if deleted:
+            logger.debug(f"Purged {deleted} expired OCR cache entries")
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
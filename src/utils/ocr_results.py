@@ -0,0 +1,38 @@
+import os
+import re
+import orjson
+import logging
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# OCR result names: vision_results_<%Y%m%d_%H%M%S>.json, plus a numeric suffix
+# for results saved in the same second
+_OCR_RESULT_PATTERN = re.compile(r'vision_results_(\d{8}_\d{6})(?:_(\d+))?\.json')
+
+def ocr_result_order(file_name: str):
+    """Sort key putting OCR result files in the order they were saved"""
+    match = _OCR_RESULT_PATTERN.fullmatch(file_name)
+    return match.group(1), int(match.group(2) or 0)
+
+def list_ocr_result_files(output_dir: str) -> List[str]:
+    """
+    Names of the OCR result files in output_dir, oldest first
+
+    Ordered by the timestamp in each name, which needs no stat call per file;
+    entries are filtered as they are read.
+    """
+    with os.scandir(output_dir) as entries:
+        return sorted(
+            (entry.name for entry in entries if _OCR_RESULT_PATTERN.fullmatch(entry.name)),
+            key=ocr_result_order
+        )
+
+def load_ocr_result(file_path: str):
+    """Load OCR result from JSON file"""
+    try:
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
+    except Exception as e:
+        logger.error(f"Error loading OCR result: {str(e)}")
+        return None
@@ -0,0 +1,161 @@
+import os
+import time
+import orjson
+import logging
+from typing import Any, Callable, Dict, List, Optional
+from config import FILE_CONFIG
+from config.logging_setup import configure_logging
+from src.generative.base.llm_base import LLMBase
+from src.utils.ocr_results import list_ocr_result_files, load_ocr_result
+
+logger = logging.getLogger(__name__)
+
+def display_summary(summary_data: dict, label: str):
+    """Display summary results in a readable format"""
+    # Everything below is INFO output; skip building it when INFO is filtered
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    logger.info(f"=== {label} Summary Results ===")
+
+    # Display metadata
+    logger.info("\nMetadata:")
+    logger.info(f"Total Pages: {summary_data['metadata']['total_pages']}")
+    logger.info(f"Primary Language: {summary_data['metadata']['primary_language']}")
+
+    # Display page summaries
+    logger.info("\nPage Summaries:")
+    for page_summary in summary_data['page_summaries']:
+        logger.info(f"\nPage {page_summary['page_number']}:")
+        logger.info(page_summary['summary'])
+
+    # Display overall summary if available
+    if summary_data.get('overall_summary'):
+        logger.info("\nOverall Summary:")
+        logger.info(summary_data['overall_summary'])
+
+def save_summary_result(summary_data: dict, provider: str) -> str:
+    """
+    Save summary results to a new JSON file
+
+    Args:
+        summary_data: Summary returned by the processor
+        provider: 'claude' or 'gemini'; selects the FILE_CONFIG output settings
+    """
+    try:
+        output_dir = FILE_CONFIG[f'{provider}_output_directory']
+        timestamp = time.strftime(FILE_CONFIG['timestamp_format'])
+        output_filename = FILE_CONFIG[f'{provider}_output_filename_pattern'].format(timestamp=timestamp)
+        output_file = os.path.join(output_dir, output_filename)
+
+        os.makedirs(os.path.dirname(output_file), exist_ok=True)
+
+        # Summaries saved in the same second (as with summarize_all) get a
+        # numeric suffix instead of replacing each other
+        base_path, extension = os.path.splitext(output_file)
+        suffix = 0
+        while True:
+            try:
+                f = open(output_file, 'xb')
+                break
+            except FileExistsError:
+                suffix += 1
+                output_file = f"{base_path}_{suffix}{extension}"
+        with f:
+            f.write(orjson.dumps(summary_data, option=orjson.OPT_INDENT_2))
+
+        logger.info(f"Summary saved to: {output_file}")
+        return output_file
+    except Exception as e:
+        logger.error(f"Error saving summary: {str(e)}")
+        return ""
+
+def _summarize_latest(processor: LLMBase, provider: str, label: str) -> None:
+    """Summarize the most recent OCR result file"""
+    output_dir = FILE_CONFIG['vision_output_directory']
+    ocr_files = list_ocr_result_files(output_dir)
+    if not ocr_files:
+        logger.error("No OCR result files found")
+        return
+
+    latest_file = ocr_files[-1]
+    logger.info(f'Processing latest OCR result file: {latest_file}')
+
+    # Load OCR result
+    ocr_data = load_ocr_result(os.path.join(output_dir, latest_file))
+    if not ocr_data:
+        return
+
+    # Generate summary
+    logger.info(f"Generating summary using {label}...")
+    summary_result = processor.process_ocr_data(ocr_data)
+
+    if summary_result:
+        # Save summary
+        save_summary_result(summary_result, provider)
+
+        # Display results
+        display_summary(summary_result, label)
+    else:
+        logger.error("Failed to generate summary")
+
+def _summarize_all(processor: LLMBase, provider: str) -> None:
+    """Summarize every OCR result file, with the documents processed concurrently"""
+    output_dir = FILE_CONFIG['vision_output_directory']
+    ocr_files = list_ocr_result_files(output_dir)
+    if not ocr_files:
+        logger.error("No OCR result files found")
+        return
+
+    # Load OCR results, skipping files that cannot be read
+    loaded_files: List[str] = []
+    ocr_data_list: List[Dict[str, Any]] = []
+    for ocr_file in ocr_files:
+        ocr_data = load_ocr_result(os.path.join(output_dir, ocr_file))
+        if ocr_data:
+            loaded_files.append(ocr_file)
+            ocr_data_list.append(ocr_data)
+
+    # The requests are network-bound, so the documents run as tasks on the
+    # processor's event loop rather than in separate processes
+    logger.info(f"Generating summaries for {len(ocr_data_list)} OCR result files...")
+    summary_results = processor.process_ocr_data_list(ocr_data_list)
+
+    for ocr_file, summary_result in zip(loaded_files, summary_results):
+        if summary_result:
+            output_path = save_summary_result(summary_result, provider)
+            if output_path:
+                logger.info(f"Summary of {ocr_file} saved to: {output_path}")
+        else:
+            logger.error(f"Failed to generate summary for {ocr_file}")
+
+def run(
+    processor_factory: Callable[[], LLMBase],
+    provider: str,
+    summarize_all: bool = False,
+    label: Optional[str] = None
+) -> None:
+    """
+    Summarize OCR results with a generative AI processor
+
+    Args:
+        processor_factory: Processor class (or any callable returning one)
+        provider: 'claude' or 'gemini'; selects the FILE_CONFIG output settings
+        summarize_all: Summarize every OCR result instead of only the latest
+        label: Name used in log output (default: provider capitalized)
+    """
+    configure_logging()
+    label = label or provider.capitalize()
+
+    # Initialize processor
+    try:
+        processor = processor_factory()
+    except Exception as e:
+        logger.error(f"Failed to initialize {getattr(processor_factory, '__name__', label)}: {str(e)}")
+        return
+
+    with processor:
+        if summarize_all:
+            _summarize_all(processor, provider)
+        else:
+            _summarize_latest(processor, provider, label)
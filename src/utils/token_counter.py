@@ -1,15 +1,12 @@
-import json
+import orjson
 from typing import Dict, Any
 import logging
-from config import LOGGING_CONFIG
 
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['level']),
-    format=LOGGING_CONFIG['format'],
-    filename=LOGGING_CONFIG['file_path']
-)
 logger = logging.getLogger(__name__)
 
+# Shared default for missing lists, so lookups do not allocate an empty list
+_EMPTY = ()
+
 class TokenCounter:
     """Utility class for counting tokens in JSON files"""
 
@@ -25,8 +22,8 @@ class TokenCounter:
             int: Total number of tokens
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = orjson.loads(f.read())
             return TokenCounter._count_structure(data)
         except Exception as e:
             logger.error(f"Error counting tokens: {str(e)}")
@@ -44,38 +41,72 @@ class TokenCounter:
             dict: Dictionary containing token statistics
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            return {
-                'total_tokens': TokenCounter._count_structure(data),
-                'structure_stats': TokenCounter._analyze_structure(data)
-            }
+            with open(file_path, 'rb') as f:
+                data = orjson.loads(f.read())
+            return TokenCounter.count_data(data)
 
         except Exception as e:
             logger.error(f"Error processing JSON file: {str(e)}")
             return {'error': str(e)}
 
     @staticmethod
-    def _count_structure(obj: Any, depth: int = 0) -> int:
-        """Recursively counts tokens in a data structure"""
-        if depth > 100:
-            logger.warning("Maximum recursion depth exceeded")
-            return 0
+    def count_data(data: Dict[str, Any]) -> dict:
+        """
+        Provides count_json_file's statistics for already loaded JSON data
 
+        Args:
+            data: Decoded JSON document
+
+        Returns:
+            dict: Dictionary containing token statistics
+        """
+        return {
+            'total_tokens': TokenCounter._count_structure(data),
+            'structure_stats': TokenCounter._analyze_structure(data)
+        }
+
+    @staticmethod
+    def _count_structure(obj: Any, max_depth: int = 100) -> int:
+        """
+        Counts tokens in a data structure
+
+        Each dict entry counts 1 plus its value, strings count their words and
+        other scalars count 1. The tree is walked one nesting level at a time
+        rather than recursively: that avoids a call per node, and values
+        nested deeper than max_depth are skipped as before.
+        """
+        total = 0
+        level = [obj]
+        depth = 0
         try:
-            if obj is None:
-                return 1
-            elif isinstance(obj, (bool, int, float)):
-                return 1
-            elif isinstance(obj, str):
-                return len(obj.split())
-            elif isinstance(obj, dict):
-                return sum(1 + TokenCounter._count_structure(v, depth + 1) for k, v in obj.items())
-            elif isinstance(obj, (list, tuple)):
-                return sum(TokenCounter._count_structure(item, depth + 1) for item in obj)
-            else:
-                return 1
+            while level:
+                if depth > max_depth:
+                    logger.warning("Maximum recursion depth exceeded")
+                    break
+                next_level = []
+                extend = next_level.extend
+                for item in level:
+                    # JSON decoders only produce the exact builtin types
+                    item_type = type(item)
+                    if item_type is str:
+                        total += len(item.split())
+                    elif item_type is dict:
+                        total += len(item)
+                        extend(item.values())
+                    elif item_type is list or item_type is tuple:
+                        extend(item)
+                    elif isinstance(item, str):
+                        total += len(item.split())
+                    elif isinstance(item, dict):
+                        total += len(item)
+                        extend(item.values())
+                    elif isinstance(item, (list, tuple)):
+                        extend(item)
+                    else:
+                        total += 1
+                level = next_level
+                depth += 1
+            return total
 
         except Exception as e:
             logger.error(f"Error in _count_structure: {str(e)}")
@@ -84,45 +115,98 @@ class TokenCounter:
     @staticmethod
     def _analyze_structure(data: Dict[str, Any]) -> Dict[str, Any]:
         """Analyzes the structure of Vision API JSON data"""
-        stats = {
-            'pages': 0,
-            'blocks': 0,
-            'paragraphs': 0,
-            'words': 0,
-            'average_confidence': 0.0,
-            'languages': set()
-        }
-
+        stats = StructureStats()
         try:
-            if 'responses' in data:
-                confidences = []
-
-                for response in data['responses']:
-                    for page in response.get('pages', []):
-                        stats['pages'] += 1
-
-                        for lang_info in page.get('detected_languages', []):
-                            stats['languages'].add(lang_info.get('language_code'))
-
-                        if 'confidence' in page:
-                            confidences.append(page['confidence'])
-
-                        for block in page.get('blocks', []):
-                            stats['blocks'] += 1
-
-                            for paragraph in block.get('paragraphs', []):
-                                stats['paragraphs'] += 1
-
-                                for word in paragraph.get('words', []):
-                                    stats['words'] += 1
-
-                if confidences:
-                    stats['average_confidence'] = sum(confidences) / len(confidences)
-
-                stats['languages'] = list(stats['languages'])
-
-            return stats
+            for response in data.get('responses', _EMPTY):
+                for page in response.get('pages', _EMPTY):
+                    stats.add_page(page)
+            return stats.as_dict()
 
         except Exception as e:
             logger.error(f"Error in structure analysis: {str(e)}")
-            return stats
+            return stats.as_dict()
+
+class StructureStats:
+    """Running page/block/paragraph/word counts, confidence and languages of Vision pages"""
+
+    def __init__(self):
+        self.pages = 0
+        self.blocks = 0
+        self.paragraphs = 0
+        self.words = 0
+        # Running sum/count of page confidences instead of a list
+        self.confidence_sum = 0.0
+        self.confidence_count = 0
+        self.languages = set()
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        """Add one page dict of a Vision result"""
+        self.pages += 1
+        # Entries without a code are skipped rather than counted as None
+        self.languages.update(
+            lang_info['language_code']
+            for lang_info in page.get('detected_languages', _EMPTY)
+            if 'language_code' in lang_info
+        )
+
+        if 'confidence' in page:
+            self.confidence_sum += page['confidence']
+            self.confidence_count += 1
+
+        # Flatten each level with a comprehension and count it with len()
+        # rather than incrementing counters in nested loops
+        blocks = page.get('blocks', _EMPTY)
+        self.blocks += len(blocks)
+        paragraphs = [paragraph for block in blocks for paragraph in block.get('paragraphs', _EMPTY)]
+        self.paragraphs += len(paragraphs)
+        self.words += sum([len(paragraph.get('words', _EMPTY)) for paragraph in paragraphs])
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics in the 'structure_stats' format"""
+        return {
+            'pages': self.pages,
+            'blocks': self.blocks,
+            'paragraphs': self.paragraphs,
+            'words': self.words,
+            'average_confidence': (
+                self.confidence_sum / self.confidence_count if self.confidence_count else 0.0
+            ),
+            'languages': list(self.languages)
+        }
+
+class ResultCounter:
+    """
+    Token and structure statistics of a Vision result written page by page
+
+    Fed the same calls that build {'responses': [{'pages': [...]}, ...],
+    'total_pages': n}, it gives the figures TokenCounter.count_json_file
+    would return for the finished file, without reading it back.
+    """
+
+    # Pages sit four levels deep: dict, 'responses' list, response dict,
+    # 'pages' list; _count_structure's depth limit applies to the whole file
+    _PAGE_MAX_DEPTH = 100 - 4
+
+    def __init__(self):
+        self.total_tokens = 1  # The top-level 'responses' entry
+        self.structure = StructureStats()
+
+    def add_response(self) -> None:
+        """Count a file response; only its 'pages' entry adds a token"""
+        self.total_tokens += 1
+
+    def add_page(self, page: Dict[str, Any]) -> None:
+        """Count one page of the current file response"""
+        self.total_tokens += TokenCounter._count_structure(page, self._PAGE_MAX_DEPTH)
+        self.structure.add_page(page)
+
+    def add_total_pages(self) -> None:
+        """Count the top-level 'total_pages' entry and its value"""
+        self.total_tokens += 2
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Return the statistics in the count_json_file format"""
+        return {
+            'total_tokens': self.total_tokens,
+            'structure_stats': self.structure.as_dict()
+        }
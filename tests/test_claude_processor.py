@@ -0,0 +1,17 @@
+import asyncio
+
+import src.generative.aws.claude as claude
+
+
+def test_request_semaphore_is_shared_per_loop():
+    async def get_twice():
+        return claude._get_request_semaphore(), claude._get_request_semaphore()
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+    assert first._value == claude.CLAUDE_CONFIG['max_concurrency']
+
+    # A new loop gets its own semaphore and the closed loop's entry is dropped
+    third, _ = asyncio.run(get_twice())
+    assert third is not first
+    assert len(claude._REQUEST_SEMAPHORES) == 1
@@ -0,0 +1,47 @@
+import importlib.util
+import os
+import sys
+
+import pytest
+
+import config._env as env
+from config.compile_env import compile_env
+
+
+@pytest.fixture
+def generated(tmp_path, monkeypatch):
+    """Compile a .env into a module and install it as config._env_generated"""
+    env_file = tmp_path / '.env'
+    env_file.write_text('OCR_TEST_VALUE=compiled\n', encoding='utf-8')
+    module_path = compile_env(env_file, tmp_path / '_env_generated.py')
+
+    def install():
+        spec = importlib.util.spec_from_file_location('config._env_generated', module_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        monkeypatch.setitem(sys.modules, 'config._env_generated', module)
+
+    dotenv_calls = []
+    monkeypatch.setattr(env, 'load_dotenv', lambda: dotenv_calls.append(True))
+    monkeypatch.delenv('OCR_TEST_VALUE', raising=False)
+    env._load.cache_clear()
+    yield env_file, install, dotenv_calls
+    env._load.cache_clear()
+
+
+def test_generated_module_is_used_while_env_file_is_unchanged(generated):
+    env_file, install, dotenv_calls = generated
+    install()
+    env._load()
+    assert os.environ['OCR_TEST_VALUE'] == 'compiled'
+    assert not dotenv_calls
+
+
+def test_stale_generated_module_falls_back_to_dotenv(generated, caplog):
+    env_file, install, dotenv_calls = generated
+    install()
+    env_file.write_text('OCR_TEST_VALUE=edited-later\n', encoding='utf-8')
+    env._load()
+    assert 'OCR_TEST_VALUE' not in os.environ
+    assert dotenv_calls == [True]
+    assert 'changed since' in caplog.text
@@ -0,0 +1,44 @@
+from contextlib import contextmanager
+
+from google.api_core.exceptions import NotFound, ServiceUnavailable
+
+import src.utils.gcp_utils as gcp_utils
+from src.utils.gcp_utils import GCPClient
+
+
+class _FakeStorage:
+    """Records deletes per batch and fails the batches listed in errors"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        self.batches = []
+
+    @contextmanager
+    def batch(self):
+        self.batches.append([])
+        yield
+        error = self.errors.get(len(self.batches) - 1)
+        if error is not None:
+            raise error
+
+
+def _client(errors, monkeypatch):
+    monkeypatch.setattr(gcp_utils, '_DELETE_BATCH_SIZE', 2)
+    client = GCPClient.__new__(GCPClient)
+    client.storage_client = _FakeStorage(errors)
+    client._bucket = type('Bucket', (), {
+        'delete_blob': lambda self, name: client.storage_client.batches[-1].append(name)
+    })()
+    return client
+
+
+def test_missing_blob_does_not_stop_later_batches(monkeypatch):
+    client = _client({0: NotFound('gone')}, monkeypatch)
+    assert client.delete_blobs(['a', 'b', 'c', 'd', 'e']) is True
+    assert client.storage_client.batches == [['a', 'b'], ['c', 'd'], ['e']]
+
+
+def test_failed_batch_is_reported_after_the_rest_are_deleted(monkeypatch):
+    client = _client({1: ServiceUnavailable('busy')}, monkeypatch)
+    assert client.delete_blobs(['a', 'b', 'c', 'd', 'e']) is False
+    assert client.storage_client.batches == [['a', 'b'], ['c', 'd'], ['e']]
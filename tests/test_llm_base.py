@@ -0,0 +1,106 @@
+import asyncio
+
+import orjson
+import pytest
+
+from config.settings import PromptTemplates
+from src.generative.base.llm_base import LLMBase
+
+
+class FakeLLM(LLMBase):
+    """Answers batched prompts from a queue and per-page prompts with a fixed summary"""
+
+    def __init__(self, batched_replies):
+        self._config = {
+            'model': 'fake-model',
+            'max_input_tokens': 100000,
+            'max_batch_pages': 20,
+            'max_batch_output_tokens': 4096,
+            'batch_output_tokens_per_page': 256,
+        }
+        self._init_language_settings({'en': PromptTemplates.ENGLISH}, 'en')
+        self.batched_replies = list(batched_replies)
+        self.prompts = []
+
+    async def _generate_text_async(self, prompt, max_output_tokens=None):
+        self.prompts.append(prompt)
+        if prompt.startswith('Summarize each page'):
+            return self.batched_replies.pop(0)
+        return f"per-page: {prompt.split(chr(10))[1]}"
+
+    def _detect_primary_language(self, pages):
+        return 'en'
+
+
+@pytest.fixture(autouse=True)
+def empty_summary_cache():
+    LLMBase._summary_cache.clear()
+    yield
+    LLMBase._summary_cache.clear()
+
+
+PAGES = [{'page_number': n, 'text': f"text of page {n}"} for n in (1, 2, 3)]
+
+
+def _reply(page_numbers, overall='overall'):
+    return orjson.dumps({
+        'page_summaries': [{'page_number': n, 'summary': f"summary {n}"} for n in page_numbers],
+        'overall_summary': overall
+    }).decode()
+
+
+def _summarize(llm):
+    return asyncio.run(llm._summarize_batched_async(PAGES, PromptTemplates.ENGLISH))
+
+
+def test_complete_reply_is_accepted_and_cached():
+    llm = FakeLLM([_reply([1, 2, 3])])
+    summaries, overall = _summarize(llm)
+    assert [s['page_number'] for s in summaries] == [1, 2, 3]
+    assert overall == 'overall'
+    assert len(LLMBase._summary_cache) == 1
+
+
+def test_missing_page_is_retried_then_summarized_on_its_own():
+    llm = FakeLLM([_reply([1, 3]), _reply([1, 3])])
+    summaries, overall = _summarize(llm)
+    assert summaries == [
+        {'page_number': 1, 'summary': 'summary 1'},
+        {'page_number': 2, 'summary': 'per-page: text of page 2'},
+        {'page_number': 3, 'summary': 'summary 3'},
+    ]
+    assert overall == 'overall'
+    # Both batched attempts were sent, and the incomplete reply was not cached
+    assert sum(p.startswith('Summarize each page') for p in llm.prompts) == 2
+    assert not any(v == _reply([1, 3]) for v in LLMBase._summary_cache.values())
+
+
+def test_retry_recovers_a_missing_page():
+    llm = FakeLLM([_reply([1, 2]), _reply([1, 2, 3])])
+    summaries, _ = _summarize(llm)
+    assert [s['summary'] for s in summaries] == ['summary 1', 'summary 2', 'summary 3']
+
+
+@pytest.mark.parametrize('page_numbers', [[1, 2, 2, 3], [1, 2, 3, 4]])
+def test_duplicate_or_unknown_pages_fall_back_to_per_page(page_numbers):
+    llm = FakeLLM([_reply(page_numbers), _reply(page_numbers)])
+    assert _summarize(llm) is None
+
+
+def test_split_text_fills_the_budget_for_ascii_words():
+    text = ' '.join(f"word{n % 97}" for n in range(20000))
+    chunks = LLMBase._split_text(text, 500)
+    estimates = [LLMBase._estimate_tokens(chunk) for chunk in chunks]
+    assert ''.join(chunks) == text
+    assert max(estimates) <= 500
+    # Every chunk but the last is close to the budget and ends at a word break
+    assert min(estimates[:-1]) >= 490
+    assert all(chunk.endswith(' ') for chunk in chunks[:-1])
+
+
+@pytest.mark.parametrize('text', ['x' * 5000, 'あ' * 1200, 'ab' * 700 + 'い' * 700])
+def test_split_text_cuts_unbroken_text_within_budget(text):
+    chunks = LLMBase._split_text(text, 500)
+    assert ''.join(chunks) == text
+    assert all(LLMBase._estimate_tokens(chunk) <= 500 for chunk in chunks)
+    assert len(chunks) == -(-LLMBase._estimate_tokens(text) // 500)
@@ -0,0 +1,106 @@
+import os
+import threading
+
+import pytest
+
+import src.utils.ocr_cache as ocr_cache
+from src.utils.ocr_cache import OCRCache
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'ocr_cache.sqlite3')
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controls the time the cache sees"""
+    now = [1_000_000.0]
+    monkeypatch.setattr(ocr_cache.time, 'time', lambda: now[0])
+    return now
+
+
+def _row_count(cache):
+    return cache._conn.execute('SELECT COUNT(*) FROM ocr_cache').fetchone()[0]
+
+
+def test_get_returns_stored_response(db_path):
+    cache = OCRCache(db_path, 60)
+    cache.put('key', b'response')
+    assert cache.get('key') == b'response'
+    assert cache.get('other') is None
+
+
+def test_expired_entry_is_a_miss_and_removed(db_path, clock):
+    cache = OCRCache(db_path, 60)
+    cache.put('key', b'response')
+    clock[0] += 61
+    assert cache.get('key') is None
+    assert _row_count(cache) == 0
+
+
+def test_zero_ttl_keeps_entries(db_path, clock):
+    cache = OCRCache(db_path, 0)
+    cache.put('key', b'response')
+    clock[0] += 10 ** 9
+    assert cache.get('key') == b'response'
+
+
+def test_stale_rows_are_purged_when_the_cache_opens(db_path, clock):
+    cache = OCRCache(db_path, 60)
+    cache.put('old', b'a')
+    clock[0] += 30
+    cache.put('new', b'b')
+    cache.close()
+
+    clock[0] += 40
+    cache = OCRCache(db_path, 60)
+    # Only the expired row is gone, without it being read
+    assert [row[0] for row in cache._conn.execute('SELECT key FROM ocr_cache')] == ['new']
+
+
+def test_stale_rows_are_purged_periodically_on_put(db_path, clock, monkeypatch):
+    monkeypatch.setattr(OCRCache, 'purge_interval', 3)
+    cache = OCRCache(db_path, 60)
+    cache.put('old', b'a')
+    clock[0] += 61
+    cache.put('b', b'b')
+    assert _row_count(cache) == 2
+    cache.put('c', b'c')
+    assert _row_count(cache) == 2
+
+
+def test_key_changes_with_content_and_fingerprint(tmp_path):
+    path = tmp_path / 'doc.pdf'
+    path.write_bytes(b'%PDF-1.4 first')
+    key = OCRCache.make_key(str(path), 'application/pdf')
+    assert OCRCache.make_key(str(path), 'application/pdf') == key
+    assert OCRCache.make_key(str(path), 'image/png') != key
+
+    # Same size and restored mtime: only the content tells them apart
+    stat = os.stat(path)
+    path.write_bytes(b'%PDF-1.4 other')
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert OCRCache.make_key(str(path), 'application/pdf') != key
+
+
+def test_concurrent_access(db_path):
+    cache = OCRCache(db_path, 60)
+    errors = []
+
+    def worker(worker_id):
+        try:
+            for n in range(200):
+                key = f"{worker_id}:{n}"
+                cache.put(key, key.encode())
+                assert cache.get(key) == key.encode()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert errors == []
+    assert _row_count(cache) == 8 * 200
@@ -0,0 +1,75 @@
+import pytest
+
+from src.utils.token_counter import ResultCounter, TokenCounter
+
+
+def _nested(depth):
+    """A value nested depth lists deep, with a string and a number at the bottom"""
+    value = {'text': 'deep words here', 'score': 0.5}
+    for _ in range(depth):
+        value = [value]
+    return value
+
+
+def _page(number, languages, confidence=0.9, extra=None):
+    page = {
+        'page_number': number,
+        'text': f"page {number} text with some words",
+        'confidence': confidence,
+        'blocks': [
+            {
+                'text': 'block text',
+                'confidence': None,
+                'block_type': 'TEXT',
+                'paragraphs': [
+                    {'text': 'para', 'words': [{'text': 'w', 'bounding_box': [{'x': 1, 'y': 2}]}] * 3},
+                    {'text': 'empty para'},
+                ],
+            },
+            {'text': '', 'block_type': 'TABLE'},
+        ],
+        'detected_languages': [{'language_code': code, 'confidence': 0.5} for code in languages]
+        + [{'confidence': 0.1}],
+    }
+    if extra is not None:
+        page['extra'] = extra
+    return page
+
+
+FIXTURES = {
+    'simple': ({'responses': [{'pages': [_page(1, ['ja']), _page(2, ['en', 'ja'])]}]}, False),
+    'detailed': (
+        {
+            'responses': [
+                {'pages': [_page(1, ['ja'], 0.7)]},
+                {'pages': []},
+                {'pages': [_page(1, [], 0.2), _page(2, ['en'])]},
+            ],
+            'total_pages': 3,
+        },
+        True,
+    ),
+    'no_responses': ({'responses': []}, False),
+    'deeply_nested': ({'responses': [{'pages': [_page(1, ['ja'], extra=_nested(120))]}]}, True),
+}
+
+
+@pytest.mark.parametrize('name', FIXTURES)
+def test_result_counter_matches_count_data(name):
+    data, with_total_pages = FIXTURES[name]
+    if with_total_pages:
+        data = {**data, 'total_pages': data.get('total_pages', 1)}
+
+    counter = ResultCounter()
+    for response in data['responses']:
+        counter.add_response()
+        for page in response['pages']:
+            counter.add_page(page)
+    if with_total_pages:
+        counter.add_total_pages()
+
+    expected = TokenCounter.count_data(data)
+    actual = counter.as_dict()
+    for stats in (expected, actual):
+        stats['structure_stats']['languages'].sort()
+    assert actual == expected
@@ -0,0 +1,211 @@
+import io
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from google.cloud import vision
+
+from config import FILE_CONFIG, VISION_CONFIG, VISION_OUTPUT_CONFIG
+import src.processors.vision_processor as vision_processor
+from src.processors.vision_processor import VisionProcessor
+from src.utils.ocr_cache import OCRCache
+
+
+class _StubGCPClient:
+    """Accepts every upload and starts an operation that finishes at once"""
+
+    def __init__(self):
+        operation = SimpleNamespace(result=lambda timeout=None: None)
+        self.vision_client = SimpleNamespace(async_batch_annotate_files=lambda **kwargs: operation)
+
+    def upload_to_storage(self, file_path, destination_blob_name, content_type=None):
+        return True, f"gs://bucket/{destination_blob_name}"
+
+
+@pytest.fixture
+def processor():
+    processor = VisionProcessor.__new__(VisionProcessor)
+    processor.vision_config = VISION_CONFIG
+    processor.file_config = FILE_CONFIG
+    processor.output_config = VISION_OUTPUT_CONFIG
+    processor.gcp_client = _StubGCPClient()
+    processor.vision_client = processor.gcp_client.vision_client
+    return processor
+
+
+@pytest.fixture
+def audit_records(monkeypatch):
+    records = []
+    monkeypatch.setattr(vision_processor, '_write_audit_record', records.append)
+    monkeypatch.setitem(vision_processor.SECURITY_CONFIG, 'enable_audit_logs', True)
+    monkeypatch.setitem(vision_processor.SECURITY_CONFIG, 'delete_after_processing', False)
+    return records
+
+
+@pytest.fixture
+def ocr_cache(tmp_path, monkeypatch):
+    cache = OCRCache(str(tmp_path / 'ocr_cache.sqlite3'), 0)
+    monkeypatch.setitem(vision_processor.VISION_CONFIG, 'cache_enabled', True)
+    monkeypatch.setattr(vision_processor, '_OCR_CACHE', cache)
+    yield cache
+    cache.close()
+
+
+@pytest.fixture(autouse=True)
+def no_default_cache(monkeypatch):
+    monkeypatch.setitem(vision_processor.VISION_CONFIG, 'cache_enabled', False)
+
+
+def _write_pdf(tmp_path, name):
+    path = tmp_path / name
+    path.write_bytes(b'%PDF-1.4\n')
+    return str(path)
+
+
+def test_batch_audits_each_document_once(tmp_path, processor, audit_records, monkeypatch):
+    ok_path = _write_pdf(tmp_path, 'ok.pdf')
+    failed_path = _write_pdf(tmp_path, 'failed.pdf')
+    missing_path = str(tmp_path / 'missing.pdf')
+
+    monkeypatch.setattr(processor, '_load_async_output', lambda prefix: object())
+    # The second document's save fails and returns ""
+    saved = iter(['out/ok.json', ''])
+    monkeypatch.setattr(processor, '_save_results', lambda response, file_path: next(saved))
+
+    output_paths = processor._process_document_batch([ok_path, failed_path, missing_path])
+
+    assert output_paths == ['out/ok.json', '', '']
+    assert sorted((r['input_file'], r['status']) for r in audit_records) == [
+        ('failed.pdf', 'failed'),
+        ('missing.pdf', 'failed'),
+        ('ok.pdf', 'success'),
+    ]
+
+
+def _response(text, total_pages=1):
+    return vision.BatchAnnotateFilesResponse(responses=[vision.AnnotateFileResponse(
+        total_pages=total_pages,
+        responses=[vision.AnnotateImageResponse(
+            full_text_annotation=vision.TextAnnotation(text=text)
+        )]
+    )])
+
+
+def _fail(*args, **kwargs):
+    raise AssertionError("should not be called on a cache hit")
+
+
+def test_cache_hit_skips_page_count(tmp_path, processor, audit_records, ocr_cache, monkeypatch):
+    path = _write_pdf(tmp_path, 'long.pdf')
+    cache_key, _ = processor._lookup_cache(path, vision_processor.os.stat(path))
+    processor._store_cache(cache_key, _response('cached'))
+
+    saved = []
+    monkeypatch.setattr(processor, '_exceeds_sync_page_limit', _fail)
+    monkeypatch.setattr(processor, '_save_results', lambda response, file_path: saved.append(response) or 'out.json')
+
+    assert processor.process_document(path) == 'out.json'
+    assert saved[0].responses[0].responses[0].full_text_annotation.text == 'cached'
+
+
+def test_batch_uses_and_fills_cache(tmp_path, processor, audit_records, ocr_cache, monkeypatch):
+    hit_path = _write_pdf(tmp_path, 'hit.pdf')
+    miss_path = tmp_path / 'miss.pdf'
+    miss_path.write_bytes(b'%PDF-1.4\nother')
+    miss_path = str(miss_path)
+    cache_key, _ = processor._lookup_cache(hit_path, vision_processor.os.stat(hit_path))
+    processor._store_cache(cache_key, _response('cached'))
+
+    uploads = []
+    upload = processor.gcp_client.upload_to_storage
+    processor.gcp_client.upload_to_storage = lambda path, *args, **kwargs: uploads.append(path) or upload(path, *args, **kwargs)
+    monkeypatch.setattr(processor, '_load_async_output', lambda prefix: _response('fresh'))
+    monkeypatch.setattr(processor, '_save_results', lambda response, file_path: file_path + '.json')
+
+    assert processor._process_document_batch([hit_path, miss_path]) == [hit_path + '.json', miss_path + '.json']
+    assert uploads == [miss_path]
+    # The fresh result is now cached for the next run
+    _, response = processor._lookup_cache(miss_path, vision_processor.os.stat(miss_path))
+    assert response.responses[0].responses[0].full_text_annotation.text == 'fresh'
+
+
+def test_partial_sync_response_is_not_cached(tmp_path, processor, ocr_cache):
+    path = _write_pdf(tmp_path, 'long.pdf')
+    cache_key, _ = processor._lookup_cache(path, vision_processor.os.stat(path))
+    processor._store_cache(cache_key, _response('first pages', total_pages=9))
+    assert processor._lookup_cache(path, vision_processor.os.stat(path))[1] is None
+
+
+@pytest.mark.parametrize('link_error', [None, PermissionError, OSError])
+def test_publish_file_never_overwrites(tmp_path, monkeypatch, link_error):
+    if link_error is not None:
+        def unsupported_link(src, dst):
+            raise link_error("hard links not supported")
+        monkeypatch.setattr(vision_processor.os, 'link', unsupported_link)
+
+    output_path = str(tmp_path / 'result.json')
+    published = []
+    for content in (b'first', b'second'):
+        tmp_file = tmp_path / f"result.json.{content.decode()}.tmp"
+        tmp_file.write_bytes(content)
+        published.append(vision_processor._publish_file(str(tmp_file), output_path))
+
+    assert published == [output_path, str(tmp_path / 'result_1.json')]
+    assert [open(path, 'rb').read() for path in published] == [b'first', b'second']
+
+
+def _ocr_fixture_response():
+    """Two files: one with a Japanese and an empty page, one with no pages"""
+    def word(text, confidence):
+        return vision.Word(
+            symbols=[vision.Symbol(text=ch) for ch in text],
+            confidence=confidence,
+            bounding_box=vision.BoundingPoly(vertices=[vision.Vertex(x=1, y=2), vision.Vertex(x=30, y=2)])
+        )
+
+    page = vision.Page(
+        confidence=0.93,
+        property=vision.TextAnnotation.TextProperty(detected_languages=[
+            vision.TextAnnotation.DetectedLanguage(language_code='ja', confidence=0.8),
+            vision.TextAnnotation.DetectedLanguage(language_code='en', confidence=0.2),
+        ]),
+        blocks=[vision.Block(
+            confidence=0.91,
+            block_type=vision.Block.BlockType.TEXT,
+            bounding_box=vision.BoundingPoly(vertices=[vision.Vertex(x=0, y=0), vision.Vertex(x=40, y=9)]),
+            paragraphs=[vision.Paragraph(confidence=0.9, words=[word('診療', 0.95), word('note', 0.4)])]
+        )]
+    )
+    return vision.BatchAnnotateFilesResponse(responses=[
+        vision.AnnotateFileResponse(total_pages=2, responses=[
+            vision.AnnotateImageResponse(full_text_annotation=vision.TextAnnotation(text='診療 note\n"q"', pages=[page])),
+            vision.AnnotateImageResponse(),
+        ]),
+        vision.AnnotateFileResponse(),
+    ])
+
+
+@pytest.mark.parametrize('output_mode', ['simple', 'detailed'])
+def test_streamed_results_match_whole_dict_serialization(processor, output_mode):
+    processor.output_config = {**VISION_OUTPUT_CONFIG, 'output_mode': output_mode, 'parallel_pages': False}
+    response = _ocr_fixture_response()
+    if output_mode == 'detailed':
+        extract = processor._detailed_extractor()
+        total_pages = response.responses[0].total_pages
+    else:
+        extract = processor._simple_extractor()
+        total_pages = None
+
+    # The dict the results were serialized from before they were streamed
+    result = {
+        'responses': [
+            {'pages': list(processor._iter_pages(file_response, extract))}
+            for file_response in response.responses
+        ]
+    }
+    if total_pages is not None:
+        result['total_pages'] = total_pages
+
+    streamed = io.BytesIO()
+    processor._write_results(streamed, response, extract, total_pages)
+    assert streamed.getvalue() == orjson.dumps(result, option=orjson.OPT_INDENT_2)
@@ -1,97 +1,106 @@
 from src.processors.vision_processor import VisionProcessor
 from src.utils.token_counter import TokenCounter
+from src.utils.ocr_results import load_ocr_result
 import logging
-from config import LOGGING_CONFIG, FILE_CONFIG
+from config import FILE_CONFIG
+from config.logging_setup import configure_logging
 import os
-import json
-
-logging.basicConfig(
-    level=getattr(logging, LOGGING_CONFIG['level']),
-    format=LOGGING_CONFIG['format'],
-    handlers=[
-        logging.FileHandler(LOGGING_CONFIG['file_path']),
-        logging.StreamHandler()
-    ]
-)
+from operator import itemgetter
+
 logger = logging.getLogger(__name__)
 
-def load_ocr_result(file_path: str):
-    """Load OCR result from JSON file"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        logger.error(f"Error loading OCR result: {str(e)}")
-        return None
+_language_code = itemgetter('language_code')
 
-def display_results(result_data, result_path):
+def display_results(result_data):
     """
     Display the OCR results in a readable format and log token statistics
     Unified display for both simple and detailed JSON formats
     """
-    logger.info("=== OCR Processing Results ===")
+    # Everything below is INFO output; skip building it when INFO is filtered
+    if not logger.isEnabledFor(logging.INFO):
+        return
+
+    # Each section is logged as one multi-line record rather than a record
+    # per line
 
     # Display response structure metadata
     total_responses = len(result_data.get('responses', []))
-    logger.info("\nDocument Overview:")
-    logger.info(f"Total Responses: {total_responses}")
+    overview_lines = [
+        "=== OCR Processing Results ===",
+        "\nDocument Overview:",
+        f"Total Responses: {total_responses}"
+    ]
 
     total_pages = 0
     detected_languages = set()
-    page_confidences = []
+    # Running sum and count of the page confidences for the average
+    confidence_sum = 0.0
+    confidence_count = 0
+    # Page contents are collected in the same pass as the metadata and logged
+    # after the overview, so the responses are walked only once
+    page_lines = ["\nPage Contents:"]
+
+    # Bound once; the loop below runs for every page and block
+    add_line = page_lines.append
 
-    # Process each response and collect metadata
+    # Process each response, collecting metadata and page contents
     for response in result_data.get('responses', []):
         for page in response.get('pages', []):
+            page_get = page.get
             total_pages += 1
             if 'detected_languages' in page:
-                for lang in page['detected_languages']:
-                    detected_languages.add(lang['language_code'])
+                detected_languages.update(map(_language_code, page['detected_languages']))
             if 'confidence' in page:
-                page_confidences.append(page['confidence'])
-
-    # Display document metadata
-    logger.info(f"Total Pages: {total_pages}")
-    if detected_languages:
-        logger.info(f"Detected Languages: {', '.join(sorted(detected_languages))}")
-    if page_confidences:
-        avg_confidence = sum(page_confidences) / len(page_confidences)
-        logger.info(f"Average Confidence: {avg_confidence:.2f}")
-
-    # Calculate and log token statistics
-    token_stats = TokenCounter.count_json_file(result_path)
-    logger.info("\nStructure Analysis:")
-    logger.info(f"Total tokens: {token_stats['total_tokens']}")
-    structure_stats = token_stats['structure_stats']
-    logger.info(f"Blocks: {structure_stats['blocks']}")
-    logger.info(f"Paragraphs: {structure_stats['paragraphs']}")
-    logger.info(f"Words: {structure_stats['words']}")
+                confidence_sum += page['confidence']
+                confidence_count += 1
 
-    # Display page contents
-    logger.info("\nPage Contents:")
-    for response in result_data.get('responses', []):
-        for page in response.get('pages', []):
-            page_number = page.get('page_number', 'Unknown')
-            logger.info(f"\nPage {page_number}:")
+            add_line(f"\nPage {page_get('page_number', 'Unknown')}:")
 
             # Display blocks (unified for both modes)
-            blocks = page.get('blocks', [])
+            blocks = page_get('blocks', [])
             for i, block in enumerate(blocks[:3], 1):
-                if block.get('text'):
-                    logger.info(f"  Block {i}: {block['text']}")
+                block_get = block.get
+                if block_get('text'):
+                    add_line(f"  Block {i}: {block['text']}")
 
                     # Display confidence
-                    if block.get('confidence') is not None:
-                        logger.info(f"    Confidence: {block['confidence']:.2f}")
+                    if block_get('confidence') is not None:
+                        add_line(f"    Confidence: {block['confidence']:.2f}")
 
                     # Display block type
-                    if block.get('block_type'):
-                        logger.info(f"    Type: {block['block_type']}")
+                    if block_get('block_type'):
+                        add_line(f"    Type: {block['block_type']}")
 
             # Add a separator line between pages
-            logger.info("  " + "-" * 50)
+            add_line("  " + "-" * 50)
+
+    # Display document metadata
+    overview_lines.append(f"Total Pages: {total_pages}")
+    if detected_languages:
+        overview_lines.append(f"Detected Languages: {', '.join(sorted(detected_languages))}")
+    if confidence_count:
+        avg_confidence = confidence_sum / confidence_count
+        overview_lines.append(f"Average Confidence: {avg_confidence:.2f}")
+    logger.info('\n'.join(overview_lines))
+
+    # Calculate and log token statistics from the loaded data rather than
+    # parsing the file a second time
+    token_stats = TokenCounter.count_data(result_data)
+    structure_stats = token_stats['structure_stats']
+    logger.info('\n'.join([
+        "\nStructure Analysis:",
+        f"Total tokens: {token_stats['total_tokens']}",
+        f"Blocks: {structure_stats['blocks']}",
+        f"Paragraphs: {structure_stats['paragraphs']}",
+        f"Words: {structure_stats['words']}"
+    ]))
+
+    # Display page contents
+    logger.info('\n'.join(page_lines))
 
 def main():
+    configure_logging(log_to_file=True)
+
     # Initialize processor
     try:
         processor = VisionProcessor()
@@ -119,7 +128,7 @@ def main():
         # Load and display results
         result_data = load_ocr_result(result_path)
         if result_data:
-            display_results(result_data, result_path)
+            display_results(result_data)
         else:
             logger.error("Failed to load OCR results")
     else: